@@ -0,0 +1,45 @@
+"""
+Dominoes game engine.
+
+The core (engine, events, snake, tiles, players, variants) is imported with the package.
+The console game, search players and tools are only imported when first used, so worker
+processes and embedding services do not pay for them.
+"""
+from importlib import import_module
+
+from .constants import DominoEnd, GameState, MoveKind
+from .domino_engine import GameEngine, Renderer, NullRenderer
+from .domino_snake import DominoSnake, IllegalMoveError
+from .events import DealEvent, PlaceEvent, DrawEvent, PassEvent, GameOverEvent, EventBatcher, EventStats
+from .player import Player, Human, Computer
+from .tile_set import TileSet
+from .variants import Variant, DOUBLE_SIX, DOUBLE_NINE, DOUBLE_TWELVE
+
+# name: module that defines it, imported on first access
+LAZY_NAMES = {
+    'GameController': 'controller',
+    'ConsoleRenderer': 'renderer',
+    'BufferedRenderer': 'renderer',
+    'LookaheadComputer': 'lookahead',
+    'MonteCarloComputer': 'monte_carlo',
+    'OpeningBook': 'opening_book',
+    'Profiler': 'profiling',
+    'play_game': 'simulation',
+    'run_games': 'simulation',
+}
+
+__all__ = ['DominoEnd', 'GameState', 'MoveKind', 'GameEngine', 'Renderer', 'NullRenderer', 'DominoSnake',
+           'IllegalMoveError', 'DealEvent', 'PlaceEvent', 'DrawEvent', 'PassEvent', 'GameOverEvent', 'EventBatcher',
+           'EventStats', 'Player', 'Human', 'Computer', 'TileSet', 'Variant', 'DOUBLE_SIX', 'DOUBLE_NINE', 'DOUBLE_TWELVE', *LAZY_NAMES]
+
+
+def __getattr__(name: str):
+    if name not in LAZY_NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{LAZY_NAMES[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
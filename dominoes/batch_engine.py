@@ -0,0 +1,188 @@
+import argparse
+from random import Random
+from time import perf_counter
+
+import numpy as np
+
+from .domino_engine import GameEngine
+from .player import Computer
+from .simulation import GameResult, play_game
+from .tiles import TILES
+from .utils import derive_seed
+
+TILE_COUNT = len(TILES)
+TILE_LEFT = np.array([left for left, right in TILES])
+TILE_RIGHT = np.array([right for left, right in TILES])
+
+# TILE_PIPS[t, p] is how many halves of tile t show pip p (2 for the double)
+TILE_PIPS = np.zeros((TILE_COUNT, 7), dtype=np.int64)
+np.add.at(TILE_PIPS, (np.arange(TILE_COUNT), TILE_LEFT), 1)
+np.add.at(TILE_PIPS, (np.arange(TILE_COUNT), TILE_RIGHT), 1)
+
+# PIP_TILES[p, t] is set when tile t can be played on an end showing p
+PIP_TILES = TILE_PIPS.T > 0
+TILE_PIP_SUMS = TILE_LEFT + TILE_RIGHT
+
+
+class BatchEngine:
+    """
+    Plays many Computer vs Computer games in lockstep with the state held in arrays.
+
+    Deals come from GameEngine with the same seeds, so every game ends exactly as
+    simulation.play_game would play it.
+    """
+
+    def __init__(self, seeds: list):
+        games = len(seeds)
+        self.seeds = list(seeds)
+        self.hands = np.zeros((games, 2, TILE_COUNT), dtype=bool)
+        self.arrivals = np.zeros((games, 2, TILE_COUNT), dtype=np.int64)  # Player.arrivals, for breaking ties
+        self.taken = np.zeros((games, 2), dtype=np.int64)  # Tiles each seat has taken
+        self.stock = np.zeros((games, TILE_COUNT), dtype=np.int64)  # Draws pop from the end
+        self.stock_size = np.zeros(games, dtype=np.int64)
+        self.snake_counts = np.zeros((games, 7), dtype=np.int64)
+        self.snake_length = np.ones(games, dtype=np.int64)
+        self.head = np.zeros(games, dtype=np.int64)
+        self.tail = np.zeros(games, dtype=np.int64)
+        self.current = np.zeros(games, dtype=np.int64)
+        self.turns = np.zeros(games, dtype=np.int64)
+        self.winner = np.full(games, -1, dtype=np.int64)
+        self.active = np.ones(games, dtype=bool)
+        self.deal()
+
+    def deal(self) -> None:
+        players = [Computer(), Computer()]
+        hand_masks, arrivals, taken, stock, stock_size, snake_counts, ends, current = [], [], [], [], [], [], [], []
+        self.redeals = []
+
+        for seed in self.seeds:
+            for player in players:
+                player.clear_hand_tiles()
+            engine = GameEngine(players, Random(seed))
+            engine.deal_dominoes()
+            engine.get_first_player()
+
+            hand_masks.append([player.hand_mask for player in players])
+            arrivals.append([[player.arrivals.get(tile_id, 0) for tile_id in range(TILE_COUNT)] for player in players])
+            taken.append([len(player.arrivals) for player in players])
+            tile_ids = engine.tile_set.tile_ids
+            stock.append(tile_ids + [0] * (TILE_COUNT - len(tile_ids)))
+            stock_size.append(len(tile_ids))
+            snake_counts.append(engine.snake.pip_counts)
+            ends.append((engine.snake.head(), engine.snake.tail()))
+            current.append(players.index(engine.current_player))
+            self.redeals.append(engine.redeals)
+
+        hand_masks = np.array(hand_masks, dtype=np.int64)
+        self.hands[:] = hand_masks[:, :, None] >> np.arange(TILE_COUNT) & 1
+        self.arrivals[:] = arrivals
+        self.taken[:] = taken
+        self.stock[:] = stock
+        self.stock_size[:] = stock_size
+        self.snake_counts[:] = snake_counts
+        self.head[:], self.tail[:] = np.array(ends).T
+        self.current[:] = current
+
+    def step(self) -> None:
+        games = np.flatnonzero(self.active)
+        seats = self.current[games]
+        head, tail = self.head[games], self.tail[games]
+        hand = self.hands[games, seats]
+
+        # Greedy Computer policy: score each tile by the frequency of its pips
+        freq = self.snake_counts[games] + hand.astype(np.int64) @ TILE_PIPS
+        score = freq @ TILE_PIPS.T
+        playable = hand & (PIP_TILES[head] | PIP_TILES[tail])
+        # Ties go to the earliest arrival, as in Computer.move. A playable score is at least 2,
+        # so its key stays above -1
+        key = score * TILE_COUNT - self.arrivals[games, seats]
+        best = np.where(playable, key, -1).argmax(axis=1)
+        can_play = playable.any(axis=1)
+
+        self.play(games[can_play], seats[can_play], best[can_play], head[can_play], tail[can_play])
+
+        drawing = ~can_play & (self.stock_size[games] > 0)
+        self.draw(games[drawing], seats[drawing])
+
+        self.turns[games] += 1
+        self.check_game_state(games, seats)
+
+    def play(self, games, seats, tile_ids, head, tail) -> None:
+        left, right = TILE_LEFT[tile_ids], TILE_RIGHT[tile_ids]
+        on_head = (left == head) | (right == head)
+
+        self.head[games] = np.where(on_head, np.where(right == head, left, right), head)
+        self.tail[games] = np.where(on_head, tail, np.where(left == tail, right, left))
+        self.hands[games, seats, tile_ids] = False
+        self.snake_counts[games] += TILE_PIPS[tile_ids]
+        self.snake_length[games] += 1
+
+    def draw(self, games, seats) -> None:
+        self.stock_size[games] -= 1
+        tile_ids = self.stock[games, self.stock_size[games]]
+        self.hands[games, seats, tile_ids] = True
+        self.arrivals[games, seats, tile_ids] = self.taken[games, seats]
+        self.taken[games, seats] += 1
+
+    def check_game_state(self, games, seats) -> None:
+        won = ~self.hands[games, seats].any(axis=1)
+        self.winner[games[won]] = seats[won]
+
+        head, tail = self.head[games], self.tail[games]
+        closed = (head == tail) & (self.snake_counts[games, head] >= 8)
+        ends = PIP_TILES[head] | PIP_TILES[tail]
+        can_move = (self.hands[games] & ends[:, None, :]).any(axis=(1, 2))
+        blocked = (self.stock_size[games] == 0) & ~can_move
+
+        finished = won | closed | blocked
+        self.active[games[finished]] = False
+        self.current[games] = np.where(finished, seats, 1 - seats)
+
+    def run(self) -> list:
+        while self.active.any():
+            self.step()
+        return self.get_results()
+
+    def get_results(self) -> list:
+        pips = self.hands.astype(np.int64) @ TILE_PIP_SUMS
+        return [GameResult(seed, None if winner < 0 else int(winner), int(turns), int(length),
+                           (int(seat_pips[0]), int(seat_pips[1])), redeals)
+                for seed, winner, turns, length, seat_pips, redeals
+                in zip(self.seeds, self.winner, self.turns, self.snake_length, pips, self.redeals)]
+
+
+def run_batch(n: int, seed: int = 0) -> list:
+    return BatchEngine([derive_seed(seed, game_index) for game_index in range(n)]).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the batch engine with the scalar GameEngine.')
+    parser.add_argument('-n', '--games', type=int, default=10000)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the run')
+    args = parser.parse_args()
+
+    seeds = [derive_seed(args.seed, game_index) for game_index in range(args.games)]
+
+    start = perf_counter()
+    first, second = Computer(), Computer()
+    scalar_results = [play_game(game_seed, first, second) for game_seed in seeds]
+    scalar_elapsed = perf_counter() - start
+
+    start = perf_counter()
+    batch = BatchEngine(seeds)
+    deal_elapsed = perf_counter() - start
+    batch_results = batch.run()
+    batch_elapsed = perf_counter() - start
+
+    if batch_results != scalar_results:
+        raise RuntimeError('The batch engine disagrees with GameEngine')
+
+    print(f'Games: {args.games}  (outcomes identical)')
+    print(f'Scalar: {args.games / scalar_elapsed:.0f} games/s ({scalar_elapsed:.2f}s)')
+    print(f'Batch:  {args.games / batch_elapsed:.0f} games/s ({batch_elapsed:.2f}s, '
+          f'{deal_elapsed:.2f}s of it dealing)')
+    print(f'Speedup: {scalar_elapsed / batch_elapsed:.2f}x')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from random import Random
+from time import perf_counter
+
+from .domino_engine import GameEngine
+from .domino_snake import DominoSnake
+from .tile_set import TileSet
+from .player import Computer
+from .constants import GameState, DominoEnd
+from .events import EventBatcher, EventStats
+from .simulation import play_game
+from .utils import derive_seed, make_rng
+from .variants import Variant, DOUBLE_TWELVE
+
+SEED = 2024
+BENCHMARKS = {}
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What a fresh worker process runs; 'python' is the bare interpreter to subtract
+STARTUP_SCRIPTS = {
+    'python': 'pass',
+    'import': 'import dominoes',
+    'first_game': 'from dominoes.simulation import play_game\n'
+                  'from dominoes.player import Computer\n'
+                  'play_game(0, Computer(), Computer())',
+}
+
+
+def benchmark(name: str):
+    # A benchmark does its setup and returns (run, ops): run() performs 'ops' operations
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def get_positions(games: int = 20) -> list:
+    # Engines stopped at every turn of some seeded games, with the computer to move
+    positions = []
+    for game_index in range(games):
+        engine = GameEngine([Computer(), Computer()], make_rng(SEED, game_index))
+        engine.deal_dominoes()
+        engine.get_first_player()
+        while engine.game_state == GameState.IN_PROGRESS:
+            positions.append(engine.clone())
+            engine.make_move()
+            engine.check_game_state()
+            engine.switch_turn()
+    return positions
+
+
+def get_placements(variant: Variant = None) -> tuple:
+    # The opening tile and the (end, tile) placements of one seeded game
+    engine = GameEngine([Computer(), Computer()], Random(SEED), variant=variant)
+    engine.deal_dominoes()
+    engine.get_first_player()
+    opening = engine.snake[0]
+    placements = []
+    while engine.game_state == GameState.IN_PROGRESS:
+        engine.observe_table()
+        domino_end, tile = engine.current_player.move(engine.snake)
+        engine.try_move(domino_end, tile)
+        if tile:
+            placements.append((domino_end, tile))
+        engine.check_game_state()
+        engine.switch_turn()
+    return opening, placements
+
+
+@benchmark('tile_set.give_tile')
+def bench_give_tile(scale: int):
+    tile_set = TileSet(Random(SEED))
+    rounds = 200 * scale
+
+    def run():
+        for _ in range(rounds):
+            tile_set.reset_tile_set()
+            while tile_set.get_set_size():
+                tile_set.give_tile()
+    return run, rounds * 28
+
+
+@benchmark('tile_set.reset_tile_set')
+def bench_reset_tile_set(scale: int):
+    tile_set = TileSet(Random(SEED))
+    rounds = 2000 * scale
+
+    def run():
+        for _ in range(rounds):
+            tile_set.reset_tile_set()
+    return run, rounds
+
+
+@benchmark('snake.append_head_tail')
+def bench_snake_append(scale: int):
+    opening, placements = get_placements()
+    appends = [(DominoSnake.append_head if domino_end == DominoEnd.HEAD else DominoSnake.append_tail, tile)
+               for domino_end, tile in placements]
+    rounds = 500 * scale
+
+    def run():
+        for _ in range(rounds):
+            snake = DominoSnake()
+            snake.append(opening)
+            for append, tile in appends:
+                append(snake, tile)
+    return run, rounds * len(placements)
+
+
+@benchmark('snake.__str__')
+def bench_snake_str(scale: int):
+    snakes = [position.snake for position in get_positions(5)]
+    rounds = 20 * scale
+
+    def run():
+        for _ in range(rounds):
+            for snake in snakes:
+                str(snake)
+    return run, rounds * len(snakes)
+
+
+@benchmark('snake.append_and_render')
+def bench_snake_render(scale: int):
+    # Display after every placement, as the console does, on a double-twelve snake
+    opening, placements = get_placements(DOUBLE_TWELVE)
+    appends = [(DominoSnake.append_head if domino_end == DominoEnd.HEAD else DominoSnake.append_tail, tile)
+               for domino_end, tile in placements]
+    rounds = 200 * scale
+
+    def run():
+        for _ in range(rounds):
+            snake = DominoSnake([opening], DOUBLE_TWELVE)
+            for append, tile in appends:
+                append(snake, tile)
+                str(snake)
+    return run, rounds * len(placements)
+
+
+@benchmark('computer.move')
+def bench_computer_move(scale: int):
+    positions = [(position.current_player, position.snake) for position in get_positions()]
+    rounds = 5 * scale
+
+    def run():
+        for _ in range(rounds):
+            for player, snake in positions:
+                player.move(snake)
+    return run, rounds * len(positions)
+
+
+@benchmark('engine.is_draw')
+def bench_is_draw(scale: int):
+    positions = get_positions(5)
+    rounds = 50 * scale
+
+    def run():
+        for _ in range(rounds):
+            for engine in positions:
+                engine.is_draw()
+    return run, rounds * len(positions)
+
+
+@benchmark('game.headless')
+def bench_headless_games(scale: int):
+    first, second = Computer(), Computer()
+    games = 100 * scale
+
+    def run():
+        for game_index in range(games):
+            play_game(derive_seed(SEED, game_index), first, second)
+    return run, games
+
+
+@benchmark('game.headless_events')
+def bench_headless_event_games(scale: int):
+    # game.headless with every event batched into one aggregator, for the cost of dispatch
+    first, second = Computer(), Computer()
+    games = 100 * scale
+    batcher = EventBatcher(EventStats().add_events)
+
+    def run():
+        for game_index in range(games):
+            play_game(derive_seed(SEED, game_index), first, second, subscribers=(batcher.add,))
+        batcher.flush()
+    return run, games
+
+
+def play_turns(variant: Variant, seed: int) -> int:
+    # A headless game among computers, returning how many turns it took
+    engine = GameEngine([Computer() for _ in range(variant.players)], Random(seed), variant=variant)
+    engine.deal_dominoes()
+    engine.get_first_player()
+    turns = 0
+    while engine.game_state == GameState.IN_PROGRESS:
+        engine.make_move()
+        engine.check_game_state()
+        engine.switch_turn()
+        turns += 1
+    return turns
+
+
+def register_variant(max_pip: int, players: int) -> None:
+    # Ops are turns, so these compare the cost of one turn across set and table sizes
+    @benchmark(f'turn.double-{max_pip}x{players}')
+    def bench_variant_turns(scale: int):
+        variant = Variant(max_pip, players)
+        seeds = [derive_seed(SEED, max_pip, players, game_index) for game_index in range(50 * scale)]
+        turns = sum(play_turns(variant, seed) for seed in seeds)
+
+        def run():
+            for seed in seeds:
+                play_turns(variant, seed)
+        return run, turns
+
+
+for max_pip, players in ((6, 2), (9, 2), (12, 2), (9, 4), (12, 8)):
+    register_variant(max_pip, players)
+
+
+def register_startup(name: str, script: str) -> None:
+    # Ops are processes started, each running the script to completion
+    @benchmark(f'startup.{name}')
+    def bench_startup(scale: int):
+        processes = 5 * scale
+
+        def run():
+            for _ in range(processes):
+                subprocess.run([sys.executable, '-c', script], cwd=PACKAGE_PARENT, check=True)
+        return run, processes
+
+
+for name, script in STARTUP_SCRIPTS.items():
+    register_startup(name, script)
+
+
+def measure(name: str, scale: int, repeat: int) -> dict:
+    run, ops = BENCHMARKS[name](scale)
+
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'ops': ops, 'seconds': best, 'ops_per_sec': ops / best, 'peak_memory_bytes': peak}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['ops_per_sec'] / baseline[name]['ops_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the engine hot paths.')
+    parser.add_argument('-o', '--output', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('-c', '--compare', metavar='PATH', help='flag regressions against saved results')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.1, help='allowed slowdown, 0.1 is 10%%')
+    parser.add_argument('-s', '--scale', type=int, default=1, help='multiply the work per benchmark')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('names', nargs='*', help='benchmarks to run, all by default')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.names or BENCHMARKS:
+        results[name] = measure(name, args.scale, args.repeat)
+        result = results[name]
+        print(f'{name:28} {result["ops_per_sec"]:>14,.0f} ops/s  peak {result["peak_memory_bytes"] / 1024:>9,.1f} KiB')
+
+    if args.output:
+        report = {'python': platform.python_version(), 'platform': platform.platform(), 'results': results}
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for name, ratio in regressions:
+            print(f'REGRESSION {name}: {ratio:.0%} of the baseline speed')
+        if regressions:
+            sys.exit(1)
+        print('No regressions against', args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@ class DominoEnd(Enum):
     TAIL = 1
 
 
+class MoveKind(Enum):
+    PLACE = "place"
+    DRAW = "draw"
+    PASS = "pass"
+
+
 class GameState(Enum):
     IN_PROGRESS = "The game is in progress."
     GAME_OVER = "The game is over."
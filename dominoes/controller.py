@@ -0,0 +1,30 @@
+from random import Random
+from .domino_engine import GameEngine
+from .constants import GameState
+from .renderer import Renderer, ConsoleRenderer
+from .profiling import Profiler
+from .variants import Variant
+
+
+class GameController:
+    def __init__(self, players: list = None, rng: Random = None, renderer: Renderer = None,
+                 profiler: Profiler = None, variant: Variant = None):
+        self.engine = GameEngine(players, rng, renderer if renderer is not None else ConsoleRenderer(), variant)
+        if profiler is not None:
+            profiler.attach(self.engine)
+
+    def run(self) -> None:
+        self.engine.deal_dominoes()
+        self.engine.get_first_player()
+        self.engine.display_interface()
+
+        while True:
+            if self.engine.current_player is not self.engine.human:
+                input()  # Wait for the user before every computer move
+            self.engine.make_move()
+            self.engine.check_game_state()
+            if self.engine.game_state in (GameState.GAME_OVER, GameState.DRAW):
+                self.engine.display_interface()
+                break
+            self.engine.switch_turn()
+            self.engine.display_interface()
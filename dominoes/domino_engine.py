@@ -1,61 +1,141 @@
-from tile_set import TileSet
-from player import Computer, Human
-from domino_snake import DominoSnake, IllegalMoveError
-from constants import GameState, DominoEnd
+from abc import ABC, abstractmethod
+from copy import copy
+from random import Random
+from .tile_set import TileSet
+from .player import Computer, Human
+from .domino_snake import DominoSnake
+from .constants import GameState, DominoEnd, MoveKind
+from .events import DealEvent, PlaceEvent, DrawEvent, PassEvent, GameOverEvent
+from .snapshot import GameSnapshot, Move, DRAW, PASS, pack_snake, unpack_snake
+from .tiles import Tile
+from .variants import Variant, DOUBLE_SIX
+
+
+class Renderer(ABC):
+    """
+    Shows the game to the user. The console renderers live in renderer.py, which the
+    engine does not import.
+    """
+
+    @abstractmethod
+    def render(self, engine) -> None:
+        pass
+
+    @abstractmethod
+    def illegal_move(self) -> None:
+        pass
+
+
+class NullRenderer(Renderer):
+    """
+    Renders nothing, for headless games.
+    """
+
+    def render(self, engine) -> None:
+        pass
+
+    def illegal_move(self) -> None:
+        pass
 
 
 class GameEngine:
-    def __init__(self):
-        self.tile_set = TileSet()
-        self.snake = DominoSnake()
-        self.human = Human()
-        self.computer = Computer()
+    def __init__(self, players: list = None, rng: Random = None, renderer: Renderer = None,
+                 variant: Variant = None):
+        self.variant = variant if variant is not None else DOUBLE_SIX
+        self.renderer = renderer if renderer is not None else NullRenderer()
+        self.rng = rng if rng is not None else Random()
+        self.tile_set = TileSet(self.rng, self.variant)
+        self.snake = DominoSnake(variant=self.variant)
+        self.players = players if players is not None else \
+            [Human()] + [Computer() for _ in range(self.variant.players - 1)]
+        if len(self.players) != self.variant.players:
+            raise ValueError(f'{self.variant.name} is played by {self.variant.players} players, not {len(self.players)}')
+        for player in self.players:
+            player.set_variant(self.variant)
+        self.human, self.computer = self.players[0], self.players[1]  # The seats the console shows
         self.current_player = self.human
         self.game_state = GameState.IN_PROGRESS
+        self.subscribers = []  # Called with every event of the game, see subscribe()
+        self.profiler = None  # Optional Profiler, set by Profiler.attach
+        self.redeals = 0  # Deals thrown away because a hand had no double
 
     def deal_dominoes(self) -> None:
-        for i in range(7):
-            self.human.take_tile(self.tile_set.give_tile())
-            self.computer.take_tile(self.tile_set.give_tile())
+        # Settle on a stock order that gives both hands a double before touching the hands
+        redeals = self.tile_set.shuffle_opening(len(self.players), self.variant.hand_size, self.variant.double_hands)
+        self.count_redeals(redeals)
+
+        for i in range(self.variant.hand_size):
+            for player in self.players:
+                player.take_tile(self.tile_set.give_tile())
 
     def get_first_player(self):
-        human_snake = self.human.get_snake_tile()
-        computer_snake = self.computer.get_snake_tile()
+        # The highest double opens and the next seat moves first
+        snake_tiles = [player.get_snake_tile() for player in self.players]
 
-        if not human_snake or not computer_snake:
+        # Only hands not dealt by deal_dominoes can fall short
+        while len(snake_tiles) - snake_tiles.count(None) < self.variant.double_hands:
+            self.count_redeals(1)
             self.tile_set.reset_tile_set()
             self.clear_players_tile_set()
             self.deal_dominoes()
-            self.get_first_player()
-        else:
-            if sum(computer_snake) > sum(human_snake):
-                self.snake.append(computer_snake)
-                self.computer.drop_tile(computer_snake)
-            else:
-                self.snake.append(human_snake)
-                self.human.drop_tile(human_snake)
-                self.switch_turn()
+            snake_tiles = [player.get_snake_tile() for player in self.players]
+
+        seat = max((i for i, tile in enumerate(snake_tiles) if tile is not None), key=lambda i: snake_tiles[i].left)
+        if self.subscribers:
+            self.publish(DealEvent(tuple(player.hand_mask for player in self.players), seat, snake_tiles[seat]))
+        self.snake.append(snake_tiles[seat])
+        self.players[seat].drop_tile(snake_tiles[seat])
+        self.current_player = self.players[seat]
+        self.switch_turn()
+
+    def subscribe(self, subscriber) -> None:
+        """
+        Call subscriber(event) with every event from now on: DealEvent, PlaceEvent,
+        DrawEvent, PassEvent and GameOverEvent. undo() publishes nothing, so search on
+        a clone(), which starts without subscribers.
+        """
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber) -> None:
+        self.subscribers.remove(subscriber)
+
+    def publish(self, event) -> None:
+        for subscriber in self.subscribers:
+            subscriber(event)
+
+    def get_seat(self) -> int:
+        return self.players.index(self.current_player)
+
+    def count_redeals(self, redeals: int) -> None:
+        self.redeals += redeals
+        if redeals and self.profiler is not None:
+            self.profiler.count('redeals', redeals)
 
     def clear_players_tile_set(self) -> None:
-        self.computer.clear_hand_tiles()
-        self.human.clear_hand_tiles()
+        for player in self.players:
+            player.clear_hand_tiles()
+
+    def get_opponent(self):
+        # The next seat, the only opponent in a two player game
+        players = self.players
+        return players[(players.index(self.current_player) + 1) % len(players)]
 
     def switch_turn(self) -> None:
-        current_player_name = self.current_player.__str__()
-        self.current_player = self.computer if current_player_name == 'Human' else self.human
+        self.current_player = self.get_opponent()
+
+    def switch_to_previous(self) -> None:
+        players = self.players
+        self.current_player = players[players.index(self.current_player) - 1]
 
     def display_interface(self) -> None:
-        print('======================================================================')
-        print('Stock size:', self.tile_set.get_set_size())
-        print('Computer pieces:', self.computer.get_amount_of_tiles(), '\n')
-        print(self.snake)
-        self.display_player_tiles()
-        print('Status:', self.get_game_status_message())
+        self.renderer.render(self)
 
     def get_game_status_message(self):
         if self.game_state == GameState.GAME_OVER:
             if self.human.get_amount_of_tiles() == 0:
                 return 'The game is over. You won!'
+            elif len(self.players) > 2:
+                return 'The game is over. A computer won!'
             else:
                 return 'The game is over. The computer won!'
         elif self.game_state == GameState.DRAW:
@@ -63,73 +143,167 @@ class GameEngine:
         else:
             return self.current_player.get_move_msg()
 
-    def display_player_tiles(self) -> None:
-        pieces = self.human.get_hand_tiles()
-        print('\nYour pieces:')
-        for i, piece in enumerate(pieces):
-            print(f'{i + 1}:{piece}')
-        print()
+    def observe_table(self) -> None:
+        self.current_player.observe(self.tile_set.get_set_size(), self.get_opponent().get_amount_of_tiles())
 
     def make_move(self):
+        self.observe_table()
+
         while True:
             domino_end, tile = self.current_player.move(self.snake)
-
-            if not domino_end and not tile:  # Pass turn
-                self.pass_turn()
+            if self.try_move(domino_end, tile):
                 return
 
-            try:
-                if domino_end == DominoEnd.HEAD:
-                    self.snake.append_head(tile)
-                else:
-                    self.snake.append_tail(tile)
+            if self.profiler is not None:
+                self.profiler.count('illegal_moves')
+            self.renderer.illegal_move()
 
-                self.current_player.drop_tile(tile)
-                return
-            except IllegalMoveError:
-                print('\nIllegal move. Please try again.')
+    def try_move(self, domino_end: DominoEnd, tile) -> bool:
+        if not domino_end and not tile:  # Pass turn
+            self.pass_turn()
+            return True
+
+        # Players may answer with a Tile or a [left, right] list, the snake only holds Tiles
+        tile_tables = self.variant.tile_tables
+        tile_id = tile_tables.get_tile_id(tile)
+        if self.variant.move_tables.is_legal_move(tile_id, domino_end, self.snake.head(), self.snake.tail()):
+            self.play_tile(domino_end, tile_tables.tile_objects[tile_id])
+            return True
+
+        return False
+
+    def play_tile(self, domino_end: DominoEnd, tile: Tile) -> None:
+        if domino_end == DominoEnd.HEAD:
+            self.snake.append_head(tile)
+        else:
+            self.snake.append_tail(tile)
+
+        self.current_player.drop_tile(tile)
+        if self.subscribers:
+            placed = self.snake[0] if domino_end == DominoEnd.HEAD else self.snake[-1]
+            self.publish(PlaceEvent(self.get_seat(), placed, domino_end))
 
     def pass_turn(self) -> None:
-        tile = self.tile_set.give_tile()
-        self.current_player.take_tile(tile)
+        self.draw_or_pass(self.tile_set.give_tile())  # None when the stock is already empty
+
+    def draw_or_pass(self, tile) -> None:
+        # The current player takes 'tile', just drawn from the stock, or passes when it is None.
+        # Every draw and pass ends here, from make_move() or apply()
+        if tile:
+            self.current_player.take_tile(tile)
+
+        if self.profiler is not None:
+            self.profiler.count('passes')
+            if tile:
+                self.profiler.count('draws')
+        if self.subscribers:
+            self.publish(DrawEvent(self.get_seat(), tile) if tile else PassEvent(self.get_seat()))
 
     def check_game_state(self) -> None:
         if self.is_win():
             self.change_game_state(GameState.GAME_OVER)
-        elif self.is_draw():
+        elif self.is_draw() or self.is_blocked():
             self.change_game_state(GameState.DRAW)
 
     def is_win(self) -> bool:
-        # Check if either the current player, human, or bot has no pieces left
-        return self.human.get_amount_of_tiles() == 0 or self.computer.get_amount_of_tiles() == 0
+        # Check if any player has no pieces left
+        return any(player.hand_mask == 0 for player in self.players)
 
     def is_draw(self) -> bool:
-        if self.snake.head() == self.snake.tail():
-            count = sum(piece.count(self.snake.head()) for piece in self.snake)
+        return self.snake.is_closed()
 
-            if count >= 8:
-                return True
+    def is_blocked(self) -> bool:
+        # Nobody can play and there is nothing left to draw
+        if self.tile_set.get_set_size() > 0:
+            return False
 
-        return False
+        head, tail = self.snake.head(), self.snake.tail()
+        can_play = self.variant.move_tables.can_play
+        return not any(can_play(player.hand_mask, head, tail) for player in self.players)
 
     def change_game_state(self, state) -> None:
         self.game_state = state
+        if self.subscribers and state != GameState.IN_PROGRESS:
+            self.publish(GameOverEvent(state, self.get_winner()))
 
+    def get_winner(self):
+        # The seat that went out, None while nobody has
+        for seat, player in enumerate(self.players):
+            if player.hand_mask == 0:
+                return seat
+        return None
 
-class GameController:
-    def __init__(self):
-        self.engine = GameEngine()
+    def snapshot(self) -> GameSnapshot:
+        return GameSnapshot(tuple(player.hand_mask for player in self.players),
+                            bytes(self.tile_set.tile_ids),
+                            pack_snake(self.snake),
+                            self.players.index(self.current_player),
+                            self.game_state)
 
-    def run(self) -> None:
-        self.engine.deal_dominoes()
-        self.engine.get_first_player()
-        self.engine.display_interface()
+    def restore(self, snapshot: GameSnapshot) -> None:
+        for player, hand_mask in zip(self.players, snapshot.hands):
+            player.set_hand_mask(hand_mask)
+        self.tile_set.set_tile_ids(list(snapshot.stock))
+        self.snake = DominoSnake(unpack_snake(snapshot.snake, self.variant.tile_tables), self.variant)
+        self.current_player = self.players[snapshot.current]
+        self.game_state = snapshot.game_state
 
-        while True:
-            self.engine.make_move()
-            self.engine.check_game_state()
-            if self.engine.game_state in (GameState.GAME_OVER, GameState.DRAW):
-                self.engine.display_interface()
-                break
-            self.engine.switch_turn()
-            self.engine.display_interface()
+    def clone(self) -> 'GameEngine':
+        # A headless copy with its own players, stock and snake. The rng is shared, and so are
+        # player caches such as LookaheadComputer's transposition table
+        engine = copy(self)
+        engine.players = [player.copy() for player in self.players]
+        engine.human, engine.computer = engine.players[0], engine.players[1]
+        engine.current_player = engine.players[self.players.index(self.current_player)]
+        engine.tile_set = self.tile_set.copy()
+        engine.snake = self.snake.copy()
+        engine.renderer = NullRenderer()
+        engine.subscribers = []
+        if self.profiler is not None:
+            self.profiler.detach(engine)
+        return engine
+
+    def get_moves(self) -> list:
+        legal_moves = self.variant.move_tables.legal_moves
+        moves = [Move(MoveKind.PLACE, tile_id, domino_end) for tile_id, domino_end, orientation
+                 in legal_moves(self.current_player.hand_mask, self.snake.head(), self.snake.tail())]
+        if not moves:
+            moves.append(DRAW if self.tile_set.get_set_size() > 0 else PASS)
+        return moves
+
+    def apply(self, move: Move) -> Move:
+        """
+        Play a whole turn: the move, the state check and the switch to the next player.
+        Returns the move to give to undo(), with the drawn tile and its place in the stock
+        filled in.
+        """
+        get_tile = self.variant.tile_tables.get_tile
+        if move.kind == MoveKind.PLACE:
+            self.play_tile(move.domino_end, get_tile(move.tile_id))
+        elif move.kind == MoveKind.DRAW:
+            if move.tile_id is None:
+                tile_id = self.tile_set.give_tile_id()
+                move = Move(MoveKind.DRAW, tile_id, stock_index=self.tile_set.get_set_size())
+            else:
+                move = Move(MoveKind.DRAW, move.tile_id, stock_index=self.tile_set.remove_tile_id(move.tile_id))
+            self.draw_or_pass(get_tile(move.tile_id))
+        else:
+            self.draw_or_pass(None)
+
+        self.check_game_state()
+        if self.game_state == GameState.IN_PROGRESS:
+            self.switch_turn()
+        return move
+
+    def undo(self, move: Move) -> None:
+        if self.game_state == GameState.IN_PROGRESS:
+            self.switch_to_previous()
+        else:
+            self.game_state = GameState.IN_PROGRESS
+
+        if move.kind == MoveKind.PLACE:
+            tile = self.snake.pop_head() if move.domino_end == DominoEnd.HEAD else self.snake.pop_tail()
+            self.current_player.take_tile(tile)
+        elif move.kind == MoveKind.DRAW:
+            self.current_player.return_tile(self.variant.tile_tables.get_tile(move.tile_id))
+            self.tile_set.return_tile_id(move.tile_id, move.stock_index)
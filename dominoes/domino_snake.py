@@ -1,5 +1,7 @@
-from _collections import deque
-from utils import reverse_tile
+from collections import deque
+from itertools import islice
+from .tiles import Tile
+from .variants import Variant, DOUBLE_SIX
 
 class Error(Exception):
     """
@@ -14,33 +16,159 @@ class IllegalMoveError(Error):
 
 
 class DominoSnake(deque):
+    def __init__(self, tiles=(), variant: Variant = None):
+        super().__init__()
+        self.variant = variant if variant is not None else DOUBLE_SIX
+        self.pip_counts = [0] * (self.variant.max_pip + 1)  # How many tile halves on the snake show each pip
+        self.head_pip = None
+        self.tail_pip = None
+        self.placed_mask = 0  # Bit 'id' is set for every tile on the snake
+        # The three tiles at each end and their renderings, which is all __str__ shows of a long snake
+        self.head_window = deque(maxlen=3)
+        self.tail_window = deque(maxlen=3)
+        self.head_text = self.tail_text = None  # None until rendered again
+        for tile in tiles:
+            self.append(tile)
+
     def head(self) -> int:
-        return self[0][0]
+        return self.head_pip
 
     def tail(self) -> int:
-        return self[-1][-1]
+        return self.tail_pip
+
+    def ends(self) -> tuple:
+        return self.head_pip, self.tail_pip
+
+    def pip_count(self, pip: int) -> int:
+        # Tile halves on the snake showing 'pip'
+        return self.pip_counts[pip]
+
+    def first(self, k: int):
+        # The k tiles from the head, without copying the snake
+        return islice(self, k)
+
+    def last(self, k: int) -> list:
+        # The k tiles at the tail, in snake order
+        tiles = list(islice(reversed(self), k))
+        tiles.reverse()
+        return tiles
+
+    def as_tile(self, tile) -> Tile:
+        # Every method placing a tile takes a Tile or a [left, right] list, the snake only holds Tiles
+        if type(tile) is Tile and tile.max_pip == self.variant.max_pip:
+            return tile
+        return self.variant.tile_tables.get_oriented_tile(tile[0], tile[1])
 
-    def append_tail(self, tile) -> None:
+    def append_tail(self, tile: Tile) -> None:
+        tile = self.as_tile(tile)
         if len(self) > 0:
-            if tile[0] == self.tail():
+            if tile.left == self.tail_pip:
                 pass
-            elif tile[1] == self.tail():
-                tile = [tile[1], tile[0]]
+            elif tile.right == self.tail_pip:
+                tile = tile.flipped
 
             else:
                 raise IllegalMoveError
 
-        super().append(tile)
+        self.append(tile)
 
-    def append_head(self, tile) -> None:
-        if tile[1] == self.head():
+    def append_head(self, tile: Tile) -> None:
+        tile = self.as_tile(tile)
+        if tile.right == self.head_pip:
             pass
-        elif tile[0] == self.head():
-            tile = [tile[1], tile[0]]
+        elif tile.left == self.head_pip:
+            tile = tile.flipped
         else:
             raise IllegalMoveError
 
+        self.appendleft(tile)
+
+    def append(self, tile: Tile) -> None:
+        tile = self.as_tile(tile)
+        super().append(tile)
+        self.placed_mask |= 1 << tile.id
+        self.pip_counts[tile.left] += 1
+        self.pip_counts[tile.right] += 1
+        self.tail_pip = tile.right
+        if self.head_pip is None:
+            self.head_pip = tile.left
+
+        self.tail_window.append(tile)
+        self.tail_text = None
+        if len(self) <= 3:
+            self.head_window.append(tile)
+            self.head_text = None
+
+    def appendleft(self, tile: Tile) -> None:
+        tile = self.as_tile(tile)
         super().appendleft(tile)
+        self.placed_mask |= 1 << tile.id
+        self.pip_counts[tile.left] += 1
+        self.pip_counts[tile.right] += 1
+        self.head_pip = tile.left
+        if self.tail_pip is None:
+            self.tail_pip = tile.right
+
+        self.head_window.appendleft(tile)
+        self.head_text = None
+        if len(self) <= 3:
+            self.tail_window.appendleft(tile)
+            self.tail_text = None
+
+    def pop_head(self) -> Tile:
+        tile = self.popleft()
+        self.forget_tile(tile)
+        self.head_window = deque(self.first(3), maxlen=3)
+        self.head_text = None
+        if len(self) < 3:
+            self.tail_window = deque(self, maxlen=3)
+            self.tail_text = None
+        return tile
+
+    def pop_tail(self) -> Tile:
+        tile = self.pop()
+        self.forget_tile(tile)
+        self.tail_window = deque(self.last(3), maxlen=3)
+        self.tail_text = None
+        if len(self) < 3:
+            self.head_window = deque(self, maxlen=3)
+            self.head_text = None
+        return tile
+
+    def forget_tile(self, tile: Tile) -> None:
+        self.placed_mask ^= 1 << tile.id
+        self.pip_counts[tile.left] -= 1
+        self.pip_counts[tile.right] -= 1
+        if len(self) > 0:
+            self.head_pip = self[0].left
+            self.tail_pip = self[-1].right
+        else:
+            self.head_pip = self.tail_pip = None
+
+    def copy(self) -> 'DominoSnake':
+        # Tiles are immutable, so the copy shares them
+        snake = DominoSnake.__new__(DominoSnake)
+        deque.__init__(snake, self)
+        snake.__dict__.update(self.__dict__)
+        snake.pip_counts = self.pip_counts[:]
+        snake.head_window = self.head_window.copy()
+        snake.tail_window = self.tail_window.copy()
+        return snake
+
+    def __copy__(self):
+        # deque's own copy protocols rebuild the snake through append() with the default variant
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()  # Nothing mutable is shared by copy()
+
+    def __reduce__(self):
+        return DominoSnake, (tuple(self), self.variant)
+
+    def is_closed(self) -> bool:
+        # Both ends show the same pip and every half with that pip is already placed
+        return (self.head_pip is not None and self.head_pip == self.tail_pip and
+                self.pip_counts[self.head_pip] >= self.variant.closed_count)
 
     def to_list(self) -> list:
         return list(self)
@@ -48,5 +176,10 @@ class DominoSnake(deque):
     def __str__(self):
         if len(self) <= 6:
             return ''.join(f'{tile}' for tile in self)
-        else:
-            return f'{self[0]}{self[1]}{self[2]}...{self[-3]}{self[-2]}{self[-1]}'
+
+        # Only the end that changed since the last call is formatted again
+        if self.head_text is None:
+            self.head_text = ''.join(f'{tile}' for tile in self.head_window)
+        if self.tail_text is None:
+            self.tail_text = ''.join(f'{tile}' for tile in self.tail_window)
+        return f'{self.head_text}...{self.tail_text}'
@@ -1,5 +1,11 @@
 # Project: Dominoes
-from domino_engine import GameController
+if __package__:
+    from .controller import GameController
+else:  # Run as a script: import the package from the folder above
+    import sys
+    from os.path import abspath, dirname
+    sys.path.insert(0, dirname(dirname(abspath(__file__))))
+    from dominoes.controller import GameController
 
 
 def main():
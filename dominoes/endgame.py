@@ -0,0 +1,143 @@
+import mmap
+import os
+from struct import Struct
+
+from .constants import DominoEnd
+from .moves import can_play, legal_moves
+from .tiles import ALL_TILES_MASK, count_halves
+
+# Positions pack into 62 bits: hand of the side to move, the other hand, head, tail.
+# A table slot stores the key with the value + 2 (1..3) in its top two bits, 0 being empty.
+VALUE_SHIFT = 62
+KEY_MASK = (1 << VALUE_SHIFT) - 1
+PROBES = 4
+TABLE_MAGIC = b'DOME'
+TABLE_HEADER = Struct('<4sxxxxQ')
+
+
+def position_key(mover: int, other: int, head: int, tail: int) -> int:
+    return mover | other << 28 | head << 56 | tail << 59
+
+
+class EndgameTable:
+    """
+    Fixed-size open-addressing memo of solved positions. With a path the slots live in a
+    memory-mapped file, so the table survives between runs and processes.
+    """
+
+    def __init__(self, path: str = None, capacity: int = 1 << 20):
+        if capacity & (capacity - 1):
+            raise ValueError('capacity must be a power of two')
+
+        self.path = path
+        self.file = None
+        self.map = None
+        self.hits = 0
+        self.misses = 0
+
+        if path is None:
+            self.capacity = capacity
+            self.buffer = bytearray(capacity * 8)
+        else:
+            self.open_file(path, capacity)
+        self.slots = memoryview(self.buffer)[TABLE_HEADER.size if path else 0:].cast('Q')
+
+    def open_file(self, path: str, capacity: int) -> None:
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as file:
+                file.write(TABLE_HEADER.pack(TABLE_MAGIC, capacity))
+                file.truncate(TABLE_HEADER.size + capacity * 8)
+
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, self.capacity = TABLE_HEADER.unpack_from(self.map)
+        if magic != TABLE_MAGIC:
+            raise ValueError('Not an endgame table')
+        self.buffer = self.map
+
+    def get_slot(self, key: int) -> int:
+        return (key * 0x9E3779B97F4A7C15 >> 20) & (self.capacity - 1)
+
+    def get(self, key: int):
+        slot = self.get_slot(key)
+        for i in range(PROBES):
+            entry = self.slots[(slot + i) & (self.capacity - 1)]
+            if not entry:
+                break
+            if entry & KEY_MASK == key:
+                self.hits += 1
+                return (entry >> VALUE_SHIFT) - 2
+        self.misses += 1
+        return None
+
+    def put(self, key: int, value: int) -> None:
+        slot = self.get_slot(key)
+        for i in range(PROBES):
+            index = (slot + i) & (self.capacity - 1)
+            entry = self.slots[index]
+            if not entry or entry & KEY_MASK == key:
+                break
+        else:
+            index = slot  # Every probed slot is taken: replace the first one
+        self.slots[index] = key | (value + 2) << VALUE_SHIFT
+
+    def __len__(self):
+        return sum(1 for entry in self.slots if entry)
+
+    def close(self) -> None:
+        self.slots.release()
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.file.close()
+            self.map = None
+
+
+class EndgameSolver:
+    """
+    Exact solver for the stock-empty endgame, where both hands are known.
+    Values are for the side to move: 1 win, 0 draw, -1 loss.
+    """
+
+    def __init__(self, table: EndgameTable = None):
+        self.table = table if table is not None else EndgameTable()
+
+    def solve(self, mover: int, other: int, head: int, tail: int) -> int:
+        key = position_key(mover, other, head, tail)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+
+        value = None
+        for move in legal_moves(mover, head, tail):
+            move_value = self.solve_move(move, mover, other, head, tail)
+            if value is None or move_value > value:
+                value = move_value
+                if value == 1:
+                    break
+
+        if value is None:  # Pass
+            value = -self.solve(other, mover, head, tail) if can_play(other, head, tail) else 0
+
+        self.table.put(key, value)
+        return value
+
+    def solve_move(self, move: tuple, mover: int, other: int, head: int, tail: int) -> int:
+        tile_id, domino_end, orientation = move
+        mover ^= 1 << tile_id
+        if not mover:
+            return 1
+
+        if domino_end == DominoEnd.HEAD:
+            head = orientation[0]
+        else:
+            tail = orientation[1]
+
+        # Every tile outside the hands is on the snake
+        if head == tail and count_halves(ALL_TILES_MASK & ~(mover | other), head) >= 8:
+            return 0
+
+        return -self.solve(other, mover, head, tail)
+
+    def get_move_values(self, mover: int, other: int, head: int, tail: int) -> list:
+        return [(move, self.solve_move(move, mover, other, head, tail)) for move in legal_moves(mover, head, tail)]
@@ -0,0 +1,220 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+from statistics import NormalDist
+
+from .player import Computer
+from .lookahead import LookaheadComputer
+from .monte_carlo import MonteCarloComputer
+from .simulation import play_game
+from .utils import derive_seed
+
+PLAYERS = {
+    'greedy': Computer,
+    'lookahead': LookaheadComputer,
+    'montecarlo': MonteCarloComputer,
+}
+
+MIN_PAIRS = 20  # Pairs before the sequential test may stop, for a usable variance estimate
+# Mirrored games between equal deterministic players always split, so the pair variance can be 0
+MIN_VARIANCE = 1e-3
+
+
+def play_pairs(seed: int, start: int, stop: int, candidate_class: type, baseline_class: type) -> list:
+    """
+    Play every deal twice, the candidate taking each seat in turn, so the luck of the
+    deal cancels out within a pair. Returns the candidate's score in each game of each
+    pair: 1 for a win, 0.5 for a draw.
+    """
+    candidate, baseline = candidate_class(), baseline_class()
+    pairs = []
+    for pair_index in range(start, stop):
+        game_seed = derive_seed(seed, pair_index)
+        first = play_game(game_seed, candidate, baseline)
+        second = play_game(game_seed, baseline, candidate)
+        pairs.append((get_score(first.winner, 0), get_score(second.winner, 1)))
+    return pairs
+
+
+def get_score(winner, seat: int) -> float:
+    return 0.5 if winner is None else float(winner == seat)
+
+
+class EvaluationStats:
+    """
+    Running totals of the candidate's results, updated as pairs come in.
+    """
+
+    def __init__(self):
+        self.pairs = 0
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.pair_total = 0.0  # Sums of the pair scores, each the mean of its two games
+        self.pair_squares = 0.0
+
+    def add(self, pair: tuple) -> None:
+        for score in pair:
+            if score == 1.0:
+                self.wins += 1
+            elif score == 0.5:
+                self.draws += 1
+            else:
+                self.losses += 1
+        pair_score = sum(pair) / 2
+        self.pairs += 1
+        self.pair_total += pair_score
+        self.pair_squares += pair_score * pair_score
+
+    @property
+    def games(self) -> int:
+        return self.pairs * 2
+
+    @property
+    def score(self) -> float:
+        return self.pair_total / self.pairs if self.pairs else 0.0
+
+    @property
+    def pair_variance(self) -> float:
+        if self.pairs < 2:
+            return 0.0
+        return max(self.pair_squares / self.pairs - self.score ** 2, 0.0) * self.pairs / (self.pairs - 1)
+
+    @property
+    def game_variance(self) -> float:
+        # Of single game scores, for comparison with the pairs
+        if self.games == 0:
+            return 0.0
+        mean = (self.wins + self.draws / 2) / self.games
+        return (self.wins + self.draws / 4) / self.games - mean * mean
+
+    def wilson_interval(self, confidence: float = 0.95) -> tuple:
+        # Over single games, counting a draw as half a win
+        n = self.games
+        if n == 0:
+            return 0.0, 1.0
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        p = (self.wins + self.draws / 2) / n
+        center = (p + z * z / (2 * n)) / (1 + z * z / n)
+        margin = z * sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return center - margin, center + margin
+
+
+class SPRT:
+    """
+    Sequential probability ratio test of H0: score = p0 against H1: score = p1, on pair
+    scores under a normal approximation. Accepting H1 means the candidate is stronger.
+    """
+
+    def __init__(self, p0: float = 0.5, p1: float = 0.55, alpha: float = 0.05, beta: float = 0.05):
+        self.p0 = p0
+        self.p1 = p1
+        self.alpha = alpha
+        self.beta = beta
+        self.lower = log(beta / (1 - alpha))
+        self.upper = log((1 - beta) / alpha)
+
+    def get_llr(self, stats: EvaluationStats) -> float:
+        variance = max(stats.pair_variance, MIN_VARIANCE)
+        return (self.p1 - self.p0) / variance * (stats.pair_total - stats.pairs * (self.p0 + self.p1) / 2)
+
+    def get_decision(self, stats: EvaluationStats):
+        # 'H1', 'H0', or None to keep playing
+        if stats.pairs < MIN_PAIRS:
+            return None
+        llr = self.get_llr(stats)
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def get_fixed_pairs(self, variance: float) -> int:
+        # Pairs a fixed-size test with the same error rates would need
+        normal = NormalDist()
+        z = normal.inv_cdf(1 - self.alpha) + normal.inv_cdf(1 - self.beta)
+        return int((z * sqrt(variance) / (self.p1 - self.p0)) ** 2) + 1
+
+
+def evaluate(candidate_class: type, baseline_class: type, sprt: SPRT, max_pairs: int = 100000, seed: int = 0,
+             workers: int = 1, batch_size: int = 50):
+    """
+    Play pairs in batches and yield (stats, decision) after each batch, stopping at a
+    decision or after max_pairs. Batches are merged in order, so a run does not depend
+    on the number of workers.
+    """
+    stats = EvaluationStats()
+    batches = [(start, min(start + batch_size, max_pairs)) for start in range(0, max_pairs, batch_size)]
+
+    if workers == 1:
+        for start, stop in batches:
+            for pair in play_pairs(seed, start, stop, candidate_class, baseline_class):
+                stats.add(pair)
+            decision = sprt.get_decision(stats)
+            yield stats, decision
+            if decision is not None:
+                return
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for start, stop in batches:
+            pending.append(executor.submit(play_pairs, seed, start, stop, candidate_class, baseline_class))
+            if len(pending) < workers * 2:
+                continue  # Keep every worker busy
+
+            for pair in pending.pop(0).result():
+                stats.add(pair)
+            decision = sprt.get_decision(stats)
+            yield stats, decision
+            if decision is not None:
+                for future in pending:
+                    future.cancel()
+                return
+
+        for future in pending:
+            for pair in future.result():
+                stats.add(pair)
+            decision = sprt.get_decision(stats)
+            yield stats, decision
+            if decision is not None:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a strategy against a baseline on mirrored deals.')
+    parser.add_argument('candidate', choices=sorted(PLAYERS))
+    parser.add_argument('baseline', nargs='?', choices=sorted(PLAYERS), default='greedy')
+    parser.add_argument('-n', '--max-pairs', type=int, default=100000)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the deals')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--p0', type=float, default=0.5, help='score under H0')
+    parser.add_argument('--p1', type=float, default=0.55, help='score under H1')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    args = parser.parse_args()
+
+    sprt = SPRT(args.p0, args.p1, args.alpha, args.beta)
+    stats = decision = None
+    for stats, decision in evaluate(PLAYERS[args.candidate], PLAYERS[args.baseline], sprt,
+                                    args.max_pairs, args.seed, args.workers):
+        low, high = stats.wilson_interval()
+        print(f'Games: {stats.games:>7}  Score: {stats.score:.3f}  95% CI: [{low:.3f}, {high:.3f}]  '
+              f'LLR: {sprt.get_llr(stats):+.2f} ({sprt.lower:.2f}, {sprt.upper:.2f})')
+
+    print(f'W/D/L: {stats.wins}/{stats.draws}/{stats.losses}')
+    if decision == 'H1':
+        print(f'{args.candidate} is stronger than {args.baseline} (score >= {args.p1})')
+    elif decision == 'H0':
+        print(f'{args.candidate} is not stronger than {args.baseline} (score <= {args.p0})')
+    else:
+        print('No decision within the game limit')
+    if stats.pair_variance:
+        # Without pairing, the mean of two games would vary by half the game variance
+        print(f'Pair variance: {stats.pair_variance:.4f} vs {stats.game_variance / 2:.4f} for two unpaired games')
+        print(f'A fixed-size test would need about {sprt.get_fixed_pairs(stats.pair_variance) * 2} games')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from .constants import DominoEnd, GameState
+from .tiles import Tile
+
+# What a GameEngine publishes to its subscribers as the game moves on, see
+# GameEngine.subscribe(). Events are only built when the engine has subscribers.
+
+
+class DealEvent(NamedTuple):
+    hands: tuple  # Hand mask of each seat, the opening double still in its hand
+    opener: int  # Seat playing the opening double
+    opening: Tile
+
+
+class PlaceEvent(NamedTuple):
+    seat: int
+    tile: Tile  # In the orientation it lies on the snake
+    domino_end: DominoEnd
+
+
+class DrawEvent(NamedTuple):
+    seat: int
+    tile: Tile
+
+
+class PassEvent(NamedTuple):
+    seat: int  # Could not play with the stock empty
+
+
+class GameOverEvent(NamedTuple):
+    game_state: GameState
+    winner: Optional[int]  # Seat that went out, None for a draw
+
+
+class EventBatcher:
+    """
+    Subscriber that buffers events and hands them to 'sink' in lists of up to 'size',
+    so that the games of a whole run can feed one aggregator a batch at a time.
+    """
+
+    def __init__(self, sink, size: int = 4096):
+        self.sink = sink
+        self.size = size
+        self.events = []
+
+    def add(self, event) -> None:
+        events = self.events
+        events.append(event)
+        if len(events) >= self.size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.events:
+            self.sink(self.events)
+            self.events = []
+
+
+class EventStats:
+    """
+    Totals over the events of any number of games, fed by add_events().
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.places = Counter()  # By end
+        self.draws = 0
+        self.passes = 0
+        self.results = Counter()  # By winning seat, None for draws
+
+    def add_events(self, events: list) -> None:
+        for event in events:
+            kind = type(event)
+            if kind is PlaceEvent:
+                self.places[event.domino_end] += 1
+            elif kind is DrawEvent:
+                self.draws += 1
+            elif kind is PassEvent:
+                self.passes += 1
+            elif kind is GameOverEvent:
+                self.games += 1
+                self.results[event.winner] += 1
+
+    def summary(self) -> dict:
+        games = self.games or 1
+        return {
+            'games': self.games,
+            'head_places': self.places[DominoEnd.HEAD],
+            'tail_places': self.places[DominoEnd.TAIL],
+            'draws_per_game': self.draws / games,
+            'passes_per_game': self.passes / games,
+            'wins': {seat: count for seat, count in sorted(self.results.items(), key=str) if seat is not None},
+            'drawn_games': self.results[None],
+        }
@@ -0,0 +1,188 @@
+import mmap
+import os
+from struct import Struct
+from typing import NamedTuple
+
+from .domino_engine import GameEngine
+from .player import Computer
+from .constants import DominoEnd, GameState
+from .events import DealEvent, PlaceEvent, DrawEvent, PassEvent
+from .tiles import TILES, get_tile, get_tile_id, iter_tile_ids
+
+# File layout:
+#   'DOMR' + version byte, then one record per game:
+#   seed (uint64), move count (uint16), 14 dealt tile ids (7 per seat), one byte per move.
+#
+# Move bytes:
+#   0..55     place tile 'id' on an end: id << 1 | 1 for the tail, id << 1 for the head
+#   128..155  draw tile 'id' from the stock: 0x80 | id
+#   255       pass with an empty stock
+MAGIC = b'DOMR\x01'
+RECORD_HEADER = Struct('<QH14s')
+DRAW_FLAG = 0x80
+PASS_MOVE = 0xFF
+HAND_SIZE = 7
+
+
+class GameRecord(NamedTuple):
+    seed: int
+    deal: bytes  # Tile ids dealt to each seat, seat 0 first
+    moves: bytes
+
+
+class GameRecorder:
+    """
+    Builds the GameRecord of one game from the events of its engine:
+    engine.subscribe(recorder.handle).
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.deal = b''
+        self.moves = bytearray()
+
+    def handle(self, event) -> None:
+        kind = type(event)
+        if kind is PlaceEvent:
+            self.record_place(event.tile, event.domino_end)
+        elif kind is DrawEvent:
+            self.record_draw(event.tile)
+        elif kind is PassEvent:
+            self.record_pass()
+        elif kind is DealEvent:
+            if event.opening.max_pip != 6:
+                raise ValueError(f'the game log only records double-six games, not double-{event.opening.max_pip}')
+            self.record_deal(event.hands)
+
+    def record_deal(self, hands: tuple) -> None:
+        deal = bytes(tile_id for hand in hands for tile_id in iter_tile_ids(hand))
+        check_deal(deal)
+        self.deal = deal
+
+    def record_place(self, tile, domino_end: DominoEnd) -> None:
+        self.moves.append(get_tile_id(tile) << 1 | (domino_end == DominoEnd.TAIL))
+
+    def record_draw(self, tile) -> None:
+        self.moves.append(DRAW_FLAG | get_tile_id(tile))
+
+    def record_pass(self) -> None:
+        self.moves.append(PASS_MOVE)
+
+    def get_record(self) -> GameRecord:
+        return GameRecord(self.seed, self.deal, bytes(self.moves))
+
+
+class GameLogWriter:
+    def __init__(self, path: str):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab')
+        if is_new:
+            self.file.write(MAGIC)
+
+    def append(self, record: GameRecord) -> None:
+        check_deal(record.deal)
+        self.file.write(RECORD_HEADER.pack(record.seed, len(record.moves), record.deal))
+        self.file.write(record.moves)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_records(path: str):
+    with open(path, 'rb') as file:
+        check_magic(file.read(len(MAGIC)))
+        while True:
+            header = file.read(RECORD_HEADER.size)
+            if not header:
+                return
+            seed, move_count, deal = RECORD_HEADER.unpack(header)
+            yield GameRecord(seed, deal, file.read(move_count))
+
+
+def check_deal(deal: bytes) -> None:
+    # The record header holds exactly two hands of double-six tiles
+    if len(deal) != 2 * HAND_SIZE or any(tile_id >= len(TILES) for tile_id in deal):
+        raise ValueError(f'the game log only records two-player double-six deals, not {len(deal)} tiles')
+
+
+def check_magic(data: bytes) -> None:
+    if data != MAGIC:
+        raise ValueError('Not a dominoes game log')
+
+
+class GameLog:
+    """
+    Random access to the records of a game log through a memory map.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        check_magic(self.map[:len(MAGIC)])
+        self.offsets = None
+
+    def get_offsets(self) -> list:
+        # Only the record headers are touched to build the index
+        if self.offsets is None:
+            self.offsets = []
+            offset = len(MAGIC)
+            while offset < len(self.map):
+                self.offsets.append(offset)
+                offset += RECORD_HEADER.size + RECORD_HEADER.unpack_from(self.map, offset)[1]
+        return self.offsets
+
+    def __len__(self):
+        return len(self.get_offsets())
+
+    def __getitem__(self, index: int) -> GameRecord:
+        offset = self.get_offsets()[index]
+        seed, move_count, deal = RECORD_HEADER.unpack_from(self.map, offset)
+        start = offset + RECORD_HEADER.size
+        return GameRecord(seed, deal, self.map[start:start + move_count])
+
+    def close(self) -> None:
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def replay(record: GameRecord):
+    """
+    Play a record back through a GameEngine, yielding the engine after every move.
+    """
+    engine = GameEngine([Computer(), Computer()])
+
+    for seat, player in enumerate(engine.players):
+        for tile_id in record.deal[seat * HAND_SIZE:(seat + 1) * HAND_SIZE]:
+            engine.tile_set.remove_tile_id(tile_id)
+            player.take_tile(get_tile(tile_id))
+
+    engine.get_first_player()
+    yield engine
+
+    for move in record.moves:
+        if move == PASS_MOVE:
+            pass
+        elif move & DRAW_FLAG:
+            tile_id = move & ~DRAW_FLAG
+            engine.tile_set.remove_tile_id(tile_id)
+            engine.current_player.take_tile(get_tile(tile_id))
+        else:
+            domino_end = DominoEnd.TAIL if move & 1 else DominoEnd.HEAD
+            engine.play_tile(domino_end, get_tile(move >> 1))
+
+        engine.check_game_state()
+        if engine.game_state == GameState.IN_PROGRESS:
+            engine.switch_turn()
+        yield engine
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import re
+from time import perf_counter
+
+TILE_PATTERN = re.compile(r'\[(\d+), (\d+)\]')
+PIECE_PATTERN = re.compile(r'^(\d+):\[(\d+), (\d+)\]$', re.MULTILINE)
+
+
+def choose_move(frame: str) -> int:
+    # Play the first piece that fits the tail or the head, or take one from the stock
+    snake = frame.split('\n')[4]
+    tiles = TILE_PATTERN.findall(snake)
+    head, tail = int(tiles[0][0]), int(tiles[-1][1])
+
+    for index, left, right in PIECE_PATTERN.findall(frame):
+        if tail in (int(left), int(right)):
+            return int(index)
+        if head in (int(left), int(right)):
+            return -int(index)
+    return 0
+
+
+async def read_frame(reader: asyncio.StreamReader) -> str:
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError('Server closed the connection')
+        line = line.decode()
+        lines.append(line)
+        if line.startswith('Status:'):
+            return ''.join(lines)
+
+
+async def play_client(open_connection, latencies: list) -> str:
+    reader, writer = await open_connection()
+    try:
+        frame = await read_frame(reader)
+        while 'game is over' not in frame:
+            writer.write(f'{choose_move(frame)}\n'.encode())
+            start = perf_counter()
+            await writer.drain()
+            frame = await read_frame(reader)
+            latencies.append(perf_counter() - start)
+        return frame.rstrip().rsplit('\n', 1)[-1]
+    finally:
+        writer.close()
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * percentile), len(ordered) - 1)]
+
+
+async def run_load_test(open_connection, clients: int, games: int) -> None:
+    latencies = []
+    failures = 0
+    start = perf_counter()
+
+    async def client_loop():
+        nonlocal failures
+        for _ in range(games):
+            try:
+                await play_client(open_connection, latencies)
+            except ConnectionError:
+                failures += 1
+
+    await asyncio.gather(*(client_loop() for _ in range(clients)))
+    elapsed = perf_counter() - start
+
+    print(f'Clients: {clients}  Games: {clients * games}  Failed: {failures}  ({elapsed:.2f}s)')
+    if latencies:
+        print(f'Moves: {len(latencies)}  Moves/s: {len(latencies) / elapsed:.0f}')
+        print(f'Move latency p50: {get_percentile(latencies, 0.5) * 1000:.2f} ms  '
+              f'p99: {get_percentile(latencies, 0.99) * 1000:.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a running game server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='connect to a unix socket instead of TCP')
+    parser.add_argument('-c', '--clients', type=int, default=100, help='concurrent connections')
+    parser.add_argument('-g', '--games', type=int, default=5, help='games per client')
+    args = parser.parse_args()
+
+    if args.unix:
+        def open_connection():
+            return asyncio.open_unix_connection(args.unix)
+    else:
+        def open_connection():
+            return asyncio.open_connection(args.host, args.port)
+
+    asyncio.run(run_load_test(open_connection, args.clients, args.games))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import argparse
+from collections import OrderedDict
+from random import Random
+from time import perf_counter
+
+from .domino_snake import DominoSnake
+from .constants import DominoEnd
+from .player import Computer
+from .moves import legal_moves
+from .tiles import TILES, TILE_OBJECTS, ALL_TILES_MASK, PIP_MASKS, iter_tile_ids
+
+WIN_SCORE = 100.0
+
+# Zobrist keys: a position hashes to the XOR of the keys of its features
+_key_rng = Random(0x5EED)
+HAND_KEYS = tuple(_key_rng.getrandbits(64) for _ in TILES)
+UNKNOWN_KEYS = tuple(_key_rng.getrandbits(64) for _ in TILES)
+HEAD_KEYS = tuple(_key_rng.getrandbits(64) for _ in range(7))
+TAIL_KEYS = tuple(_key_rng.getrandbits(64) for _ in range(7))
+STOCK_KEYS = tuple(_key_rng.getrandbits(64) for _ in range(len(TILES) + 1))
+OPPONENT_KEYS = tuple(_key_rng.getrandbits(64) for _ in range(len(TILES) + 1))
+OPPONENT_TURN_KEY = _key_rng.getrandbits(64)
+PASSED_KEY = _key_rng.getrandbits(64)
+
+
+def position_key(hand: int, unknown: int, head: int, tail: int, stock: int, opponent: int,
+                 my_turn: bool, passed: bool) -> int:
+    key = HEAD_KEYS[head] ^ TAIL_KEYS[tail] ^ STOCK_KEYS[stock] ^ OPPONENT_KEYS[opponent]
+    for tile_id in iter_tile_ids(hand):
+        key ^= HAND_KEYS[tile_id]
+    for tile_id in iter_tile_ids(unknown):
+        key ^= UNKNOWN_KEYS[tile_id]
+    if not my_turn:
+        key ^= OPPONENT_TURN_KEY
+    if passed:
+        key ^= PASSED_KEY
+    return key
+
+
+class SearchTimeout(Exception):
+    """
+    Raise when a search runs out of its time budget.
+    """
+
+
+class TranspositionTable:
+    """
+    Bounded map from position key to (depth, value), evicting the least recently used entry.
+    """
+
+    def __init__(self, max_size: int = 1 << 17):
+        self.entries = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int, depth: int):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] >= depth:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key: int, depth: int, value: float) -> None:
+        self.entries[key] = (depth, value)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LookaheadComputer(Computer):
+    """
+    Expectimax player with iterative deepening.
+
+    The opponent holds 'opponent_tiles' of the unseen tiles, each subset being equally
+    likely. On its turn it plays the best tile it holds or draws; our own draws are
+    averaged over the unseen tiles. The closed-snake draw rule is not searched.
+    """
+    standard_only = True  # Searches with the double-six tables
+
+    def __init__(self, max_depth: int = 6, time_budget: float = 0.05, table_size: int = 1 << 17,
+                 opening_book: 'OpeningBook' = None):
+        super().__init__(opening_book=opening_book)
+        self.max_depth = max_depth
+        self.time_budget = time_budget  # Seconds per move
+        self.table = TranspositionTable(table_size)
+        self.deadline = 0.0
+        self.nodes = 0
+        self.last_depth = 0
+        self.total_nodes = 0
+        self.total_time = 0.0
+        self.searches = 0
+
+    def move(self, snake: DominoSnake = None):
+        head, tail = snake.head(), snake.tail()
+        moves = list(legal_moves(self.hand_mask, head, tail))
+        if len(moves) <= 1:
+            return super().move(snake)
+        book_move = self.get_book_move(snake)
+        if book_move is not None:
+            tile_id, domino_end, orientation = book_move
+            return domino_end, TILE_OBJECTS[tile_id]
+
+        unknown = ALL_TILES_MASK & ~self.hand_mask & ~snake.placed_mask
+        stock, opponent = self.stock_size, self.opponent_tiles
+        key = position_key(self.hand_mask, unknown, head, tail, stock, opponent, True, False)
+
+        start = perf_counter()
+        self.deadline = start + self.time_budget
+        self.nodes = 0
+        self.last_depth = 0
+        best_move = moves[0]
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_value = None
+                for move in moves:
+                    value = self.search_placement(move, self.hand_mask, unknown, head, tail, stock, opponent,
+                                                  True, False, depth, key)
+                    if best_value is None or value > best_value:
+                        best_value, depth_best_move = value, move
+            except SearchTimeout:
+                break
+            best_move = depth_best_move
+            self.last_depth = depth
+            # Search the best move first next time
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        self.searches += 1
+        self.total_nodes += self.nodes
+        self.total_time += perf_counter() - start
+
+        tile_id, domino_end, orientation = best_move
+        return domino_end, TILE_OBJECTS[tile_id]
+
+    def get_search_stats(self) -> dict:
+        return {
+            'searches': self.searches,
+            'nodes': self.total_nodes,
+            'nodes_per_second': self.total_nodes / self.total_time if self.total_time else 0.0,
+            'last_depth': self.last_depth,
+            'table_size': len(self.table),
+            'table_hits': self.table.hits,
+            'table_misses': self.table.misses,
+        }
+
+    def search(self, hand, unknown, head, tail, stock, opponent, my_turn, passed, depth, key) -> float:
+        self.nodes += 1
+        if not self.nodes & 1023 and perf_counter() > self.deadline:
+            raise SearchTimeout
+
+        if not hand:
+            return WIN_SCORE + depth  # Prefer the quicker win
+        if not opponent:
+            return -WIN_SCORE - depth
+        if depth == 0:
+            return self.evaluate(hand, head, tail, opponent)
+
+        value = self.table.get(key, depth)
+        if value is None:
+            if my_turn:
+                value = self.search_own_turn(hand, unknown, head, tail, stock, opponent, passed, depth, key)
+            else:
+                value = self.search_opponent_turn(hand, unknown, head, tail, stock, opponent, passed, depth, key)
+            self.table.put(key, depth, value)
+        return value
+
+    def search_placement(self, move, hand, unknown, head, tail, stock, opponent, my_turn, passed, depth, key):
+        tile_id, domino_end, orientation = move
+        key ^= OPPONENT_TURN_KEY
+        if passed:
+            key ^= PASSED_KEY
+
+        if my_turn:
+            hand ^= 1 << tile_id
+            key ^= HAND_KEYS[tile_id]
+        else:
+            unknown ^= 1 << tile_id
+            key ^= UNKNOWN_KEYS[tile_id] ^ OPPONENT_KEYS[opponent] ^ OPPONENT_KEYS[opponent - 1]
+            opponent -= 1
+
+        if domino_end == DominoEnd.HEAD:
+            key ^= HEAD_KEYS[head] ^ HEAD_KEYS[orientation[0]]
+            head = orientation[0]
+        else:
+            key ^= TAIL_KEYS[tail] ^ TAIL_KEYS[orientation[1]]
+            tail = orientation[1]
+
+        return self.search(hand, unknown, head, tail, stock, opponent, not my_turn, False, depth - 1, key)
+
+    def search_pass(self, hand, unknown, head, tail, stock, opponent, my_turn, passed, depth, key) -> float:
+        if passed:
+            return 0.0  # Nobody can move: the game is blocked
+        key ^= OPPONENT_TURN_KEY ^ PASSED_KEY
+        return self.search(hand, unknown, head, tail, stock, opponent, not my_turn, True, depth - 1, key)
+
+    def search_own_turn(self, hand, unknown, head, tail, stock, opponent, passed, depth, key) -> float:
+        best = None
+        for move in legal_moves(hand, head, tail):
+            value = self.search_placement(move, hand, unknown, head, tail, stock, opponent, True, passed, depth, key)
+            if best is None or value > best:
+                best = value
+        if best is not None:
+            return best
+
+        if not stock:
+            return self.search_pass(hand, unknown, head, tail, stock, opponent, True, passed, depth, key)
+
+        # Draw: every unseen tile is equally likely to come out of the stock
+        key ^= OPPONENT_TURN_KEY ^ STOCK_KEYS[stock] ^ STOCK_KEYS[stock - 1]
+        if passed:
+            key ^= PASSED_KEY
+        total = 0.0
+        count = 0
+        for tile_id in iter_tile_ids(unknown):
+            bit = 1 << tile_id
+            total += self.search(hand | bit, unknown ^ bit, head, tail, stock - 1, opponent, False, False,
+                                 depth - 1, key ^ HAND_KEYS[tile_id] ^ UNKNOWN_KEYS[tile_id])
+            count += 1
+        return total / count
+
+    def search_opponent_turn(self, hand, unknown, head, tail, stock, opponent, passed, depth, key) -> float:
+        # The value of each tile the opponent might play, taking its best end
+        options = []
+        last_tile_id = None
+        for move in legal_moves(unknown, head, tail):
+            value = self.search_placement(move, hand, unknown, head, tail, stock, opponent, False, passed, depth, key)
+            if move[0] == last_tile_id:
+                options[-1] = min(options[-1], value)
+            else:
+                options.append(value)
+                last_tile_id = move[0]
+        options.sort()
+
+        # The opponent plays the best option it holds: weigh each option by the chance
+        # that the opponent holds it but none of the better ones
+        unseen = unknown.bit_count()
+        p_none = 1.0
+        expected = 0.0
+        for i, value in enumerate(options):
+            p_none_next = p_none * max(unseen - opponent - i, 0) / (unseen - i)
+            expected += (p_none - p_none_next) * value
+            p_none = p_none_next
+
+        if p_none > 0:
+            if stock:
+                key ^= OPPONENT_TURN_KEY ^ STOCK_KEYS[stock] ^ STOCK_KEYS[stock - 1]
+                key ^= OPPONENT_KEYS[opponent] ^ OPPONENT_KEYS[opponent + 1]
+                if passed:
+                    key ^= PASSED_KEY
+                value = self.search(hand, unknown, head, tail, stock - 1, opponent + 1, True, False, depth - 1, key)
+            else:
+                value = self.search_pass(hand, unknown, head, tail, stock, opponent, False, passed, depth, key)
+            expected += p_none * value
+
+        return expected
+
+    @staticmethod
+    def evaluate(hand: int, head: int, tail: int, opponent: int) -> float:
+        mobility = (hand & (PIP_MASKS[head] | PIP_MASKS[tail])).bit_count()
+        return opponent - hand.bit_count() + 0.1 * mobility
+
+
+def main():
+    from .simulation import run_games
+
+    parser = argparse.ArgumentParser(description='Play LookaheadComputer against Computer.')
+    parser.add_argument('-n', '--games', type=int, default=200)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the run')
+    parser.add_argument('-d', '--depth', type=int, default=6)
+    parser.add_argument('-t', '--time', type=float, default=0.05, help='time budget per move in seconds')
+    args = parser.parse_args()
+
+    player = LookaheadComputer(args.depth, args.time)
+    wins = [0, 0]
+    draws = 0
+    for result in run_games(args.games, args.seed, player, Computer()):
+        if result.winner is None:
+            draws += 1
+        else:
+            wins[result.winner] += 1
+
+    stats = player.get_search_stats()
+    print(f'Games: {args.games}  Lookahead: {wins[0]}  Computer: {wins[1]}  Draws: {draws}')
+    print(f'Searches: {stats["searches"]}  Nodes: {stats["nodes"]}  '
+          f'Nodes/s: {stats["nodes_per_second"]:.0f}  Table: {stats["table_size"]} entries, '
+          f'{stats["table_hits"]} hits / {stats["table_misses"]} misses')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+from random import Random
+from time import perf_counter
+
+from .domino_snake import DominoSnake
+from .constants import DominoEnd
+from .player import Computer
+from .moves import legal_moves
+from .tiles import TILES, TILE_OBJECTS, ALL_TILES_MASK, PIP_MASKS, count_halves, iter_tile_ids
+
+SAMPLE_ATTEMPTS = 50
+
+
+def greedy_move(hand: int, head: int, tail: int, snake_counts: list):
+    # The Computer heuristic on bare masks, which keep no hand order: ties go to the lowest tile id
+    best_move = None
+    best_score = -1
+    for move in legal_moves(hand, head, tail):
+        left, right = TILES[move[0]]
+        score = snake_counts[left] + snake_counts[right] + count_halves(hand, left) + count_halves(hand, right)
+        if score > best_score:
+            best_move = move
+            best_score = score
+    return best_move
+
+
+def sample_deal(rng: Random, unknown_ids: list, opponent_count: int, constraints: tuple) -> tuple:
+    """
+    Split the unseen tiles into an opponent hand and a stock order. Each constraint
+    (tiles mask, allowance) caps how many of those tiles the opponent may hold; deals
+    breaking one are resampled a few times before giving up on them.
+    """
+    for _ in range(SAMPLE_ATTEMPTS):
+        tile_ids = unknown_ids[:]
+        rng.shuffle(tile_ids)
+        opponent = 0
+        for tile_id in tile_ids[:opponent_count]:
+            opponent |= 1 << tile_id
+        if all((opponent & mask).bit_count() <= allowance for mask, allowance in constraints):
+            break
+    return opponent, tile_ids[opponent_count:]
+
+
+def rollout(hands: list, stock: list, head: int, tail: int, snake_counts: list, turn: int) -> float:
+    """
+    Play greedily to the end and return the score of seat 0: 1 for a win, 0.5 for a draw.
+    """
+    passes = 0
+    while True:
+        hand = hands[turn]
+        move = greedy_move(hand, head, tail, snake_counts)
+        if move is not None:
+            tile_id, domino_end, orientation = move
+            hand ^= 1 << tile_id
+            hands[turn] = hand
+            snake_counts[orientation[0]] += 1
+            snake_counts[orientation[1]] += 1
+            if domino_end == DominoEnd.HEAD:
+                head = orientation[0]
+            else:
+                tail = orientation[1]
+
+            if not hand:
+                return 1.0 if turn == 0 else 0.0
+            if head == tail and snake_counts[head] >= 8:
+                return 0.5
+            passes = 0
+        elif stock:
+            hands[turn] = hand | 1 << stock.pop()
+            passes = 0
+        else:
+            passes += 1
+            if passes == 2:  # Blocked
+                return 0.5
+        turn ^= 1
+
+
+def run_rollouts(seed: int, move: tuple, hand: int, unknown_ids: list, opponent_count: int, constraints: tuple,
+                 head: int, tail: int, snake_counts: list, count: int) -> float:
+    rng = Random(seed)
+    tile_id, domino_end, orientation = move
+    hand ^= 1 << tile_id
+    if domino_end == DominoEnd.HEAD:
+        head = orientation[0]
+    else:
+        tail = orientation[1]
+    snake_counts = list(snake_counts)
+    snake_counts[orientation[0]] += 1
+    snake_counts[orientation[1]] += 1
+
+    if not hand:
+        return float(count)
+
+    total = 0.0
+    for _ in range(count):
+        opponent, stock = sample_deal(rng, unknown_ids, opponent_count, constraints)
+        total += rollout([hand, opponent], stock, head, tail, list(snake_counts), 1)
+    return total
+
+
+class MonteCarloComputer(Computer):
+    """
+    Determinization player: scores each legal move by greedy rollouts over opponent
+    hands sampled from the unseen tiles, consistent with the opponent's passes and draws.
+    """
+    standard_only = True  # Rolls out with the double-six tables
+
+    def __init__(self, rollouts: int = 400, time_limit: float = 0.1, batch_size: int = 25,
+                 workers: int = 1, rng: Random = None, opening_book: 'OpeningBook' = None):
+        super().__init__(opening_book=opening_book)
+        self.rollouts = rollouts  # Rollout budget per move
+        self.time_limit = time_limit  # Seconds per move
+        self.batch_size = batch_size
+        self.workers = workers
+        self.rng = rng if rng is not None else Random()
+        self.executor = None
+        self.total_rollouts = 0
+        self.total_time = 0.0
+        self.reset_knowledge()
+
+    def reset_knowledge(self) -> None:
+        self.constraints = []  # [tiles mask the opponent lacked, tiles drawn since]
+        self.last_length = None
+        self.last_stock = 0
+        self.last_ends = None
+
+    def clear_hand_tiles(self) -> None:
+        super().clear_hand_tiles()
+        self.reset_knowledge()
+
+    def move(self, snake: DominoSnake = None):
+        self.update_knowledge(snake)
+
+        head, tail = snake.head(), snake.tail()
+        moves = list(legal_moves(self.hand_mask, head, tail))
+        if len(moves) <= 1:
+            best_move = moves[0] if moves else None
+        else:
+            best_move = self.get_book_move(snake)
+            if best_move is None:
+                best_move = self.choose_move(moves, snake)
+
+        self.remember(snake, best_move)
+        if best_move is None:
+            return None, None
+
+        tile_id, domino_end, orientation = best_move
+        return domino_end, TILE_OBJECTS[tile_id]
+
+    def copy(self) -> 'MonteCarloComputer':
+        player = super().copy()
+        player.constraints = [constraint[:] for constraint in self.constraints]
+        return player
+
+    def update_knowledge(self, snake: DominoSnake) -> None:
+        if self.last_length is None or len(snake) != self.last_length:
+            return  # First move of the game, or the opponent played a tile
+
+        # The opponent could not play on the ends we left, then drew if it could
+        head, tail = self.last_ends
+        self.constraints.append([PIP_MASKS[head] | PIP_MASKS[tail], 0])
+        if self.stock_size < self.last_stock:
+            for constraint in self.constraints:
+                constraint[1] += 1
+
+    def remember(self, snake: DominoSnake, move) -> None:
+        head, tail = snake.head(), snake.tail()
+        if move is None:
+            self.last_length = len(snake)
+            self.last_stock = max(self.stock_size - 1, 0)
+        else:
+            tile_id, domino_end, orientation = move
+            self.last_length = len(snake) + 1
+            self.last_stock = self.stock_size
+            if domino_end == DominoEnd.HEAD:
+                head = orientation[0]
+            else:
+                tail = orientation[1]
+        self.last_ends = head, tail
+
+    def choose_move(self, moves: list, snake: DominoSnake):
+        unknown = ALL_TILES_MASK & ~self.hand_mask & ~snake.placed_mask
+        unknown_ids = list(iter_tile_ids(unknown))
+        constraints = tuple((mask & unknown, allowance) for mask, allowance in self.constraints)
+        task = (self.hand_mask, unknown_ids, self.opponent_tiles, constraints,
+                snake.head(), snake.tail(), snake.pip_counts)
+
+        scores = [0.0] * len(moves)
+        played = 0
+        start = perf_counter()
+        while played < self.rollouts and perf_counter() - start < self.time_limit:
+            count = min(self.batch_size, self.rollouts - played)
+            seeds = [self.rng.getrandbits(64) for _ in moves]
+            if self.workers > 1:
+                executor = self.get_executor()
+                futures = [executor.submit(run_rollouts, seed, move, *task, count) for seed, move in zip(seeds, moves)]
+                results = [future.result() for future in futures]
+            else:
+                results = [run_rollouts(seed, move, *task, count) for seed, move in zip(seeds, moves)]
+            for i, result in enumerate(results):
+                scores[i] += result
+            played += count
+
+        self.total_rollouts += played * len(moves)
+        self.total_time += perf_counter() - start
+        return moves[max(range(len(moves)), key=scores.__getitem__)]
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def get_rollout_stats(self) -> dict:
+        return {
+            'rollouts': self.total_rollouts,
+            'rollouts_per_second': self.total_rollouts / self.total_time if self.total_time else 0.0,
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['executor'] = None
+        return state
+
+
+def main():
+    from .simulation import run_games
+
+    parser = argparse.ArgumentParser(description='Play MonteCarloComputer against Computer.')
+    parser.add_argument('-n', '--games', type=int, default=200)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the run')
+    parser.add_argument('-r', '--rollouts', type=int, default=400, help='rollout budget per move')
+    parser.add_argument('-t', '--time', type=float, default=0.1, help='time limit per move in seconds')
+    parser.add_argument('-w', '--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    player = MonteCarloComputer(args.rollouts, args.time, workers=args.workers, rng=Random(args.seed))
+    score = 0.0
+    games = 0
+    checkpoint = 10
+    try:
+        for result in run_games(args.games, args.seed, player, Computer()):
+            games += 1
+            score += 0.5 if result.winner is None else result.winner == 0
+            if games == checkpoint or games == args.games:
+                rate = score / games
+                error = sqrt(rate * (1 - rate) / games)
+                print(f'After {games} games: score {rate:.3f} +/- {1.96 * error:.3f}')
+                checkpoint *= 2
+    finally:
+        player.close()
+
+    stats = player.get_rollout_stats()
+    print(f'Rollouts: {stats["rollouts"]}  Rollouts/s: {stats["rollouts_per_second"]:.0f}')
+
+
+if __name__ == "__main__":
+    main()
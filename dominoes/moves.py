@@ -0,0 +1,69 @@
+from functools import lru_cache
+
+from .constants import DominoEnd
+from .tiles import TileTables, get_tile_tables, iter_tile_ids
+
+
+def build_move_table(domino_end: DominoEnd, tile_tables: TileTables) -> tuple:
+    # table[pip][tile_id] is the move placing the tile on an end showing 'pip',
+    # or None when the tile does not fit there
+    table = []
+    for pip in range(tile_tables.max_pip + 1):
+        moves = []
+        for tile_id, (left, right) in enumerate(tile_tables.tiles):
+            if pip not in (left, right):
+                moves.append(None)
+                continue
+            other = right if left == pip else left
+            orientation = (other, pip) if domino_end == DominoEnd.HEAD else (pip, other)
+            moves.append((tile_id, domino_end, orientation))
+        table.append(tuple(moves))
+    return tuple(table)
+
+
+class MoveTables:
+    """
+    Legal move generation for one set, built once per set by get_move_tables().
+    """
+
+    def __init__(self, tile_tables: TileTables):
+        self.pip_masks = tile_tables.pip_masks
+        self.head_moves = build_move_table(DominoEnd.HEAD, tile_tables)
+        self.tail_moves = build_move_table(DominoEnd.TAIL, tile_tables)
+
+    def legal_moves(self, hand: int, head: int, tail: int):
+        """
+        Yield every (tile_id, end, orientation) the hand mask can play, in tile id order,
+        the head move first when a tile fits both ends. The tuples are precomputed.
+        """
+        head_moves, tail_moves = self.head_moves[head], self.tail_moves[tail]
+
+        for tile_id in iter_tile_ids(hand & (self.pip_masks[head] | self.pip_masks[tail])):
+            move = head_moves[tile_id]
+            if move is not None:
+                yield move
+            move = tail_moves[tile_id]
+            if move is not None:
+                yield move
+
+    def is_legal_move(self, tile_id: int, domino_end: DominoEnd, head: int, tail: int) -> bool:
+        pip = head if domino_end == DominoEnd.HEAD else tail
+        return bool(self.pip_masks[pip] >> tile_id & 1)
+
+    def can_play(self, hand: int, head: int, tail: int) -> bool:
+        return bool(hand & (self.pip_masks[head] | self.pip_masks[tail]))
+
+
+@lru_cache(maxsize=None)
+def get_move_tables(max_pip: int) -> MoveTables:
+    return MoveTables(get_tile_tables(max_pip))
+
+
+# The double-six set
+STANDARD_MOVES = get_move_tables(6)
+HEAD_MOVES = STANDARD_MOVES.head_moves
+TAIL_MOVES = STANDARD_MOVES.tail_moves
+
+legal_moves = STANDARD_MOVES.legal_moves
+is_legal_move = STANDARD_MOVES.is_legal_move
+can_play = STANDARD_MOVES.can_play
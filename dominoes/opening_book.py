@@ -0,0 +1,308 @@
+import mmap
+from bisect import bisect_left
+from itertools import permutations, product
+from random import Random
+from struct import Struct
+from time import perf_counter
+
+from .constants import DominoEnd, GameState
+from .moves import HEAD_MOVES, TAIL_MOVES
+from .tiles import TILES, TILE_IDS, count_halves, iter_tile_ids
+
+# A position is keyed on the hand of the side to move, the snake ends as (low, high),
+# so that mirrored snakes share an entry, and the stock size. Renaming the pips does not
+# change a position, so it is keyed in its canonical naming, see canonicalize(): exact
+# hands hardly ever repeat, renamed ones do.
+# The file is a header, the sorted keys as uint64 and then one move byte per key, in the
+# canonical naming: tile_id << 1 | 1 when the tile goes on the end showing the high pip.
+BOOK_MAGIC = b'DOB2'
+BOOK_HEADER = Struct('<4sHxxQ')  # Magic, plies covered, number of positions
+PIPS = range(7)
+IDENTITY = tuple(PIPS)
+
+
+def position_key(hand: int, head: int, tail: int, stock_size: int) -> int:
+    low, high = (head, tail) if head <= tail else (tail, head)
+    return hand | low << 28 | high << 31 | stock_size << 34
+
+
+def get_pip_signatures(hand: int, tiles: list, head: int, tail: int) -> list:
+    # What each pip looks like whatever it is called: how many ends show it, its halves
+    # in hand with the double counting twice, and the halves of the pips it shares a tile with
+    halves = [count_halves(hand, pip) for pip in PIPS]
+    neighbours = [[] for _ in PIPS]
+    for left, right in tiles:
+        if left != right:
+            neighbours[left].append(halves[right])
+            neighbours[right].append(halves[left])
+    return [((head == pip) + (tail == pip), halves[pip], sorted(neighbours[pip])) for pip in PIPS]
+
+
+def canonicalize(hand: int, head: int, tail: int, stock_size: int) -> tuple:
+    """
+    Return (key, relabel): the smallest key of the position over the namings of its pips,
+    and the naming that gives it, relabel[pip] being the new name of 'pip'.
+
+    Pips are named in order of their signatures, so only pips with equal signatures are
+    tried in every order. Pips on no end and in no tile are interchangeable and never are.
+    """
+    tiles = [TILES[tile_id] for tile_id in iter_tile_ids(hand)]
+    signatures = get_pip_signatures(hand, tiles, head, tail)
+    groups = []
+    for pip in sorted(PIPS, key=signatures.__getitem__):
+        if groups and signatures[groups[-1][0]] == signatures[pip]:
+            groups[-1].append(pip)
+        else:
+            groups.append([pip])
+    choices = [permutations(group) if len(group) > 1 and signatures[group[0]][:2] != (0, 0) else (group,)
+               for group in groups]
+
+    best_key = best_relabel = None
+    for arrangement in product(*choices):
+        relabel = [0] * 7
+        name = 0
+        for group in arrangement:
+            for pip in group:
+                relabel[pip] = name
+                name += 1
+        mapped = 0
+        for left, right in tiles:
+            mapped |= 1 << TILE_IDS[relabel[left], relabel[right]]
+        key = position_key(mapped, relabel[head], relabel[tail], stock_size)
+        if best_key is None or key < best_key:
+            best_key, best_relabel = key, relabel
+    return best_key, best_relabel
+
+
+def encode_move(tile_id: int, domino_end: DominoEnd, head: int, tail: int, relabel: tuple = IDENTITY) -> int:
+    left, right = TILES[tile_id]
+    pip, other = (head, tail) if domino_end == DominoEnd.HEAD else (tail, head)
+    return TILE_IDS[relabel[left], relabel[right]] << 1 | (relabel[pip] > relabel[other])
+
+
+def decode_move(code: int, head: int, tail: int, relabel: tuple = IDENTITY) -> tuple:
+    # The precomputed (tile_id, end, orientation) move, see moves.legal_moves()
+    names = [0] * 7
+    for pip, name in enumerate(relabel):
+        names[name] = pip
+    left, right = TILES[code >> 1]
+    tile_id = TILE_IDS[names[left], names[right]]
+    if head == tail or code & 1 == (relabel[head] > relabel[tail]):
+        return HEAD_MOVES[head][tile_id]
+    return TAIL_MOVES[tail][tile_id]
+
+
+class OpeningBook:
+    """
+    Best known moves for opening positions, read from a file built by build_book().
+    The file is memory-mapped on the first lookup and searched in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.map = None
+        self.keys = None
+        self.moves = None
+        self.max_length = None  # Snakes longer than this are past the opening
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> None:
+        self.file = open(self.path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, plies, size = BOOK_HEADER.unpack_from(self.map)
+        if magic != BOOK_MAGIC:
+            raise ValueError('Not an opening book')
+        self.max_length = plies  # The opening double and plies - 1 moves
+
+        start = BOOK_HEADER.size
+        self.keys = memoryview(self.map)[start:start + size * 8].cast('Q')
+        self.moves = memoryview(self.map)[start + size * 8:start + size * 9]
+
+    def get_move(self, hand: int, snake, stock_size: int):
+        # The (tile_id, end, orientation) move to play, or None when the position is not in the book
+        if self.keys is None:
+            self.load()
+        if len(snake) > self.max_length:
+            return None
+
+        head, tail = snake.head(), snake.tail()
+        key, relabel = canonicalize(hand, head, tail, stock_size)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            self.hits += 1
+            return decode_move(self.moves[index], head, tail, relabel)
+        self.misses += 1
+        return None
+
+    def __len__(self):
+        if self.keys is None:
+            self.load()
+        return len(self.keys)
+
+    def close(self) -> None:
+        if self.map is not None:
+            self.keys.release()
+            self.moves.release()
+            self.map.close()
+            self.file.close()
+            self.keys = self.moves = self.map = self.file = None
+
+
+def write_book(path: str, entries: dict, plies: int) -> None:
+    keys = sorted(entries)
+    with open(path, 'wb') as file:
+        file.write(BOOK_HEADER.pack(BOOK_MAGIC, plies, len(keys)))
+        file.write(b''.join(key.to_bytes(8, 'little') for key in keys))
+        file.write(bytes(entries[key] for key in keys))
+
+
+def get_book_move(engine, rollouts: int, rng: Random):
+    """
+    Score each legal move of the side to move by greedy rollouts over the deals
+    consistent with what it can see, as MonteCarloComputer does, and return the best.
+    """
+    from .monte_carlo import run_rollouts
+    from .tiles import ALL_TILES_MASK, iter_tile_ids
+
+    player = engine.current_player
+    snake = engine.snake
+    moves = list(engine.variant.move_tables.legal_moves(player.hand_mask, snake.head(), snake.tail()))
+    if len(moves) < 2:
+        return None
+
+    unknown_ids = list(iter_tile_ids(ALL_TILES_MASK & ~player.hand_mask & ~snake.placed_mask))
+    scores = [run_rollouts(rng.getrandbits(64), move, player.hand_mask, unknown_ids,
+                           engine.get_opponent().get_amount_of_tiles(), (), snake.head(), snake.tail(),
+                           snake.pip_counts, rollouts)
+              for move in moves]
+    return moves[max(range(len(moves)), key=scores.__getitem__)]
+
+
+def build_book(games: int, seed: int = 0, plies: int = 2, rollouts: int = 200) -> dict:
+    """
+    Play seeded Computer games and settle the first plies of each with rollouts, following
+    the book's moves so that reruns of the same seeds meet the same positions.
+    Positions with a single legal move are left to the heuristic.
+    """
+    from .domino_engine import GameEngine
+    from .player import Computer
+    from .utils import make_rng
+
+    rng = Random(seed)
+    players = [Computer(), Computer()]
+    entries = {}
+    for game_index in range(games):
+        for player in players:
+            player.clear_hand_tiles()
+        engine = GameEngine(players, make_rng(seed, game_index))
+        engine.deal_dominoes()
+        engine.get_first_player()
+
+        for ply in range(plies):
+            if engine.game_state != GameState.IN_PROGRESS:
+                break
+            head, tail = engine.snake.head(), engine.snake.tail()
+            key, relabel = canonicalize(engine.current_player.hand_mask, head, tail, engine.tile_set.get_set_size())
+            if key not in entries:
+                move = get_book_move(engine, rollouts, rng)
+                if move is not None:
+                    tile_id, domino_end, orientation = move
+                    entries[key] = encode_move(tile_id, domino_end, head, tail, relabel)
+
+            if key in entries:
+                tile_id, domino_end, orientation = decode_move(entries[key], head, tail, relabel)
+                engine.play_tile(domino_end, engine.variant.tile_tables.get_tile(tile_id))
+            else:
+                engine.make_move()
+            engine.check_game_state()
+            engine.switch_turn()
+    return entries
+
+
+def measure_book(book: OpeningBook, games: int, seed: int, reference=None) -> dict:
+    """
+    Play Computer games with the book and time the reference player, the plain Computer
+    heuristic by default, on every position the book answered.
+    """
+    from .domino_engine import GameEngine
+    from .player import Computer
+    from .utils import make_rng
+
+    book.load()  # Not part of the per-move latency
+    players = [Computer(opening_book=book), Computer(opening_book=book)]
+    reference = reference if reference is not None else Computer()
+    book_time = reference_time = 0.0
+    for game_index in range(games):
+        for player in players:
+            player.clear_hand_tiles()
+        engine = GameEngine(players, make_rng(seed, game_index))
+        engine.deal_dominoes()
+        engine.get_first_player()
+        while engine.game_state == GameState.IN_PROGRESS:
+            engine.observe_table()
+            player = engine.current_player
+            hits = book.hits
+            start = perf_counter()
+            domino_end, tile = player.move(engine.snake)
+            elapsed = perf_counter() - start
+            if book.hits > hits:
+                book_time += elapsed
+                reference.clear_hand_tiles()  # Also forgets what a search player inferred
+                reference.set_hand_mask(player.hand_mask)
+                reference.observe(player.stock_size, player.opponent_tiles)
+                start = perf_counter()
+                reference.move(engine.snake)
+                reference_time += perf_counter() - start
+            engine.try_move(domino_end, tile)
+            engine.check_game_state()
+            engine.switch_turn()
+
+    return {'hits': book.hits, 'misses': book.misses, 'book_seconds': book_time, 'reference_seconds': reference_time}
+
+
+def main():
+    import argparse  # The book is imported by every Computer, the command line is not
+
+    parser = argparse.ArgumentParser(description='Build an opening book from simulated games, or measure one.')
+    parser.add_argument('path', help='the book file')
+    parser.add_argument('--build', type=int, metavar='GAMES', help='build the book from this many games')
+    parser.add_argument('-n', '--games', type=int, default=2000, help='games to measure the book on')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the run')
+    parser.add_argument('--plies', type=int, default=2, help='opening moves the book covers')
+    parser.add_argument('--rollouts', type=int, default=200, help='rollouts per move when building')
+    parser.add_argument('--measure-seed', type=int,
+                        help='master seed of the measured games, fresh deals by default')
+    parser.add_argument('--against', choices=['greedy', 'lookahead', 'montecarlo'], default='greedy',
+                        help='the player whose moves the book latency is compared to')
+    args = parser.parse_args()
+
+    if args.build:
+        start = perf_counter()
+        entries = build_book(args.build, args.seed, args.plies, args.rollouts)
+        write_book(args.path, entries, args.plies)
+        elapsed = perf_counter() - start
+        print(f'Book: {len(entries)} positions from {args.build} games ({elapsed:.1f}s, '
+              f'{elapsed / max(len(entries), 1) * 1e3:.1f} ms of rollouts per position)')
+
+    from .evaluation import PLAYERS
+    from .utils import derive_seed
+
+    book = OpeningBook(args.path)
+    # Deals the book was not built from, unless asked: canonical positions repeat across deals
+    measure_seed = derive_seed(args.seed, 'measure') if args.measure_seed is None else args.measure_seed
+    reference = PLAYERS[args.against]()
+    stats = measure_book(book, args.games, measure_seed, reference)
+    lookups = stats['hits'] + stats['misses']
+    print(f'Lookups: {lookups}  Hit rate: {stats["hits"] / lookups if lookups else 0:.2%}')
+    if stats['hits']:
+        book_us = stats['book_seconds'] / stats['hits'] * 1e6
+        reference_us = stats['reference_seconds'] / stats['hits'] * 1e6
+        print(f'Per hit: book {book_us:.2f} us, {args.against} {reference_us:.2f} us, '
+              f'saved {reference_us - book_us:.2f} us')
+    book.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,132 @@
 from abc import ABC, abstractmethod
-from utils import sort_dictionary_by_values, concat_lists
-from domino_snake import DominoSnake
-from constants import DominoEnd
+from copy import copy
+from .domino_snake import DominoSnake
+from .constants import DominoEnd
+from .tiles import Tile, iter_tile_ids
+from .variants import Variant, DOUBLE_SIX
 
 
 class Player(ABC):
+    standard_only = False  # Set by players built on the double-six tables, see set_variant()
+
     def __init__(self):
-        self.hand_tiles = []
+        self.variant = DOUBLE_SIX  # Set by the engine, see set_variant()
+        self.tile_tables = DOUBLE_SIX.tile_tables
+        self.move_tables = DOUBLE_SIX.move_tables
+        self.hand_mask = 0  # Bit 'id' is set for every tile in the hand
+        self.pip_counts = [0] * 7  # How many tile halves in the hand show each pip
+        self.arrivals = {}  # Tile id: how many tiles came into the hand before it this deal
+        self.stock_size = 0  # What the player knows about the table, see observe()
+        self.opponent_tiles = 0
 
     @abstractmethod
     def move(self):
         pass
 
-    def take_tile(self, tile: list) -> None:
-        self.hand_tiles.append(tile)
+    def observe(self, stock_size: int, opponent_tiles: int) -> None:
+        self.stock_size = stock_size
+        self.opponent_tiles = opponent_tiles
+
+    def set_variant(self, variant: Variant) -> None:
+        if self.standard_only and not variant.is_standard:
+            raise ValueError(f'{type(self).__name__} only plays the standard game, not {variant.name}')
+
+        # A hand dealt from another set means nothing in this one
+        if variant is not self.variant:
+            self.variant = variant
+            self.tile_tables = variant.tile_tables
+            self.move_tables = variant.move_tables
+            self.clear_hand_tiles()
+
+    @property
+    def hand_tiles(self) -> list:
+        # In the order the tiles came into the hand, dealt tiles first and draws after them
+        get_tile = self.tile_tables.get_tile
+        return [get_tile(tile_id) for tile_id in sorted(iter_tile_ids(self.hand_mask), key=self.arrivals.__getitem__)]
+
+    def as_tile(self, tile) -> Tile:
+        # Hands take a Tile or a [left, right] list either way round, and hold the shared Tile
+        if type(tile) is Tile and tile.max_pip == self.variant.max_pip:
+            return tile
+        return self.tile_tables.get_tile(self.tile_tables.get_tile_id(tile))
+
+    def take_tile(self, tile: Tile) -> None:
+        tile = self.as_tile(tile)
+        bit = 1 << tile.id
+        if not self.hand_mask & bit:
+            self.hand_mask |= bit
+            self.pip_counts[tile.left] += 1
+            self.pip_counts[tile.right] += 1
+            # A tile put back by GameEngine.undo() keeps its place, drop_tile() leaves it
+            self.arrivals.setdefault(tile.id, len(self.arrivals))
+
+    def return_tile(self, tile: Tile) -> None:
+        # Undo the last take_tile(), forgetting when the tile came
+        tile = self.as_tile(tile)
+        self.drop_tile(tile)
+        del self.arrivals[tile.id]
 
     def get_snake_tile(self):
-        snakes = [x for x in self.hand_tiles if x[0] == x[1]]
+        doubles = self.hand_mask & self.tile_tables.doubles_mask
 
-        if not snakes:
+        if not doubles:
             return None
 
-        max_piece = snakes[0]
-        max_sum = sum(max_piece)
-
-        for tile in snakes[1:]:
-            current_sum = sum(tile)
-            if current_sum > max_sum:
-                max_piece = tile
-                max_sum = current_sum
-
-        return max_piece
+        # Doubles are numbered in increasing order, so the highest bit is the biggest one
+        return self.tile_tables.get_tile(doubles.bit_length() - 1)
 
     def get_hand_tiles(self) -> list:
         return self.hand_tiles
 
-    def drop_tile(self, tile: list) -> None:
+    def get_matching_tiles(self, pip: int) -> int:
+        return self.hand_mask & self.tile_tables.pip_masks[pip]
+
+    def has_tile(self, tile: list) -> bool:
+        return bool(self.hand_mask >> self.tile_tables.get_tile_id(tile) & 1)
+
+    def drop_tile(self, tile: Tile) -> None:
         if tile:
-            if tile in self.hand_tiles:
-                self.hand_tiles.remove(tile)
-            elif tile.reverse() in self.hand_tiles:
-                self.hand_tiles.remove(tile.reverse())
+            tile = self.as_tile(tile)
+            bit = 1 << tile.id
+            if self.hand_mask & bit:
+                self.hand_mask ^= bit
+                self.pip_counts[tile.left] -= 1
+                self.pip_counts[tile.right] -= 1
 
     def clear_hand_tiles(self) -> None:
-        self.hand_tiles.clear()
+        self.hand_mask = 0
+        self.pip_counts = [0] * (self.variant.max_pip + 1)
+        self.arrivals = {}
+
+    def set_hand_mask(self, hand_mask: int) -> None:
+        self.hand_mask = hand_mask
+        self.pip_counts = [self.tile_tables.count_halves(hand_mask, pip) for pip in range(self.variant.max_pip + 1)]
+        # Tiles the hand has held keep their order, new ones follow in tile id order
+        arrivals = self.arrivals
+        order = sorted(iter_tile_ids(hand_mask), key=lambda tile_id: (tile_id not in arrivals, arrivals.get(tile_id, tile_id)))
+        self.arrivals = {tile_id: i for i, tile_id in enumerate(order)}
+
+    def copy(self) -> 'Player':
+        player = copy(self)
+        player.pip_counts = self.pip_counts[:]
+        player.arrivals = self.arrivals.copy()
+        return player
 
     def get_amount_of_tiles(self):
-        return len(self.hand_tiles)
+        return self.hand_mask.bit_count()
 
-    def get_tile_by_index(self, index: int) -> list:
+    def get_tile_by_index(self, index: int) -> Tile:
+        if not 0 <= index < self.get_amount_of_tiles():
+            raise IndexError('tile index out of range')
         return self.hand_tiles[index]
 
 
 class Human(Player):
 
     def move(self, snake: DominoSnake = None):
-        index = self.prompt_player_move()
+        return self.get_move_by_index(self.prompt_player_move())
+
+    def get_move_by_index(self, index: int):
         if index == 0:
             return None, None
         else:
@@ -64,11 +135,14 @@ class Human(Player):
             if index > 0:
                 return DominoEnd.TAIL, self.get_tile_by_index(index - 1)
 
+    def is_valid_index(self, index: int) -> bool:
+        return abs(index) < self.get_amount_of_tiles() + 1
+
     def prompt_player_move(self) -> int:
         while True:
             try:
                 move = int(input())
-                if abs(move) < self.get_amount_of_tiles() + 1:
+                if self.is_valid_index(move):
                     return move
                 else:
                     print("Invalid input. Please try again. ")
@@ -84,29 +158,77 @@ class Human(Player):
 
 
 class Computer(Player):
+    def __init__(self, endgame_tiles: int = 0, endgame_solver: 'EndgameSolver' = None,
+                 opening_book: 'OpeningBook' = None):
+        super().__init__()
+        # Consulted first in the standard game. A lookup costs more than the heuristic, so for
+        # Computer the book buys rollout-quality openings; search players also save their search
+        self.opening_book = opening_book
+        # Solve the game exactly once the stock is empty and both hands together hold at most this many tiles
+        self.endgame_tiles = endgame_tiles
+        self.endgame_solver = endgame_solver
+        if endgame_tiles and endgame_solver is None:
+            from .endgame import EndgameSolver  # Only loaded by players that solve endgames
+
+            self.endgame_solver = EndgameSolver()
 
     def move(self, snake: DominoSnake = None):
-        input()
+        snake_freq, hand_freq = snake.pip_counts, self.pip_counts
+        tiles = self.tile_tables.tiles
+        arrivals = self.arrivals
+        moves = self.move_tables.legal_moves(self.hand_mask, snake.head(), snake.tail())
+        if self.is_endgame():
+            moves = self.get_winning_moves(snake)
+        elif self.opening_book is not None:
+            book_move = self.get_book_move(snake)
+            if book_move is not None:
+                moves = (book_move,)
+
+        # A tile scores the frequency of its pips over the snake and the hand. The highest
+        # score wins, ties going to the tile that came into the hand first, and a tile
+        # fitting both ends goes on the head.
+        best_move = None
+        best_score = -1
+        best_arrival = 0
+        for move in moves:
+            tile_id = move[0]
+            left, right = tiles[tile_id]
+            score = snake_freq[left] + hand_freq[left] + snake_freq[right] + hand_freq[right]
+            if score > best_score or score == best_score and arrivals[tile_id] < best_arrival:
+                best_move = move
+                best_score = score
+                best_arrival = arrivals[tile_id]
+
+        if best_move is None:
+            return None, None
 
-        tiles = concat_lists(snake.to_list(), self.hand_tiles)
+        tile_id, domino_end, orientation = best_move
+        return domino_end, self.tile_tables.tile_objects[tile_id]
 
-        # Get frequency dict for the total pieces
-        pieces_freq_dict = Computer.get_tiles_frequency(tiles)
+    def get_book_move(self, snake: DominoSnake):
+        # The opening book's move for this position, if there is a book and it has one
+        if self.opening_book is None or not self.variant.is_standard:
+            return None
+        return self.opening_book.get_move(self.hand_mask, snake, self.stock_size)
 
-        # Get score dict for the pieces
-        score_dict = self.get_score_for_hand_tiles(pieces_freq_dict)
+    def is_endgame(self) -> bool:
+        # The solver knows the double-six set and a single opponent holding every unseen tile
+        return (self.endgame_tiles > 0 and self.variant.is_standard and self.stock_size == 0 and
+                self.get_amount_of_tiles() + self.opponent_tiles <= self.endgame_tiles)
 
-        for piece, score in score_dict.items():
-            if piece[0] == snake.head() or piece[1] == snake.head():
-                return DominoEnd.HEAD, list(piece)
-            elif piece[0] == snake.tail() or piece[1] == snake.tail():
-                return DominoEnd.TAIL, list(piece)
+    def get_winning_moves(self, snake: DominoSnake) -> list:
+        # The moves with the best solved outcome. With the stock empty, the opponent holds every unseen tile
+        opponent = self.tile_tables.all_tiles_mask & ~self.hand_mask & ~snake.placed_mask
+        move_values = self.endgame_solver.get_move_values(self.hand_mask, opponent, snake.head(), snake.tail())
+        if not move_values:
+            return []
 
-        return None, None
+        best_value = max(value for move, value in move_values)
+        return [move for move, value in move_values if value == best_value]
 
     @staticmethod
-    def get_tiles_frequency(total_tiles: list) -> dict:
-        freq_dict = {key: 0 for key in range(7)}
+    def get_tiles_frequency(total_tiles: list, max_pip: int = 6) -> dict:
+        freq_dict = {key: 0 for key in range(max_pip + 1)}
 
         for piece in total_tiles:
             left, right = piece
@@ -116,15 +238,6 @@ class Computer(Player):
 
         return freq_dict
 
-    def get_score_for_hand_tiles(self, freq_dict: dict) -> dict:
-        score_dict = {}
-
-        for tile in self.hand_tiles:
-            l, r = tile
-            score_dict[(l, r)] = freq_dict[l] + freq_dict[r]
-
-        return sort_dictionary_by_values(score_dict)  # Return sorted dictionary in descending order
-
     @staticmethod
     def get_move_msg() -> str:
         return 'Computer is about to make a move. Press Enter to continue...'
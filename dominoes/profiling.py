@@ -0,0 +1,129 @@
+import sys
+from collections import Counter
+from functools import wraps
+from time import perf_counter_ns
+
+# GameEngine methods timed by Profiler.attach; 'move' is the players' decision
+ENGINE_PHASES = ('deal_dominoes', 'get_first_player', 'make_move', 'play_tile', 'check_game_state',
+                 'display_interface')
+
+
+class Histogram:
+    """
+    Durations bucketed by powers of two of nanoseconds.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * 64  # Bucket i holds durations below 2 ** i ns
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, nanoseconds: int) -> None:
+        self.buckets[nanoseconds.bit_length()] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def get_percentile(self, percentile: float) -> int:
+        # Upper bound of the bucket holding the percentile
+        target = percentile * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return 1 << i
+        return 0
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': self.total / 1e6,
+            'mean_us': self.total / self.count / 1e3 if self.count else 0.0,
+            'p50_us': self.get_percentile(0.5) / 1e3,
+            'p99_us': self.get_percentile(0.99) / 1e3,
+            'max_us': self.max / 1e3,
+            'buckets_ns': {1 << i: count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class Profiler:
+    """
+    Opt-in per-phase timers and event counters for GameEngine.
+
+    attach() wraps the timed methods on the engine instance itself, so an engine
+    without a profiler runs its plain methods.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = Counter()
+        self.dump_thread = None
+        self.dump_stop = None
+
+    def attach(self, engine) -> None:
+        engine.profiler = self
+        for phase in ENGINE_PHASES:
+            setattr(engine, phase, self.wrap(phase, getattr(engine, phase)))
+        for player in engine.players:
+            player.__dict__.pop('move', None)  # Players outlive engines, do not wrap twice
+            player.move = self.wrap('move', player.move)
+
+    @staticmethod
+    def detach(engine) -> None:
+        # Drop the timed wrappers, which clones copy along with the instance attributes
+        engine.profiler = None
+        for phase in ENGINE_PHASES:
+            engine.__dict__.pop(phase, None)
+        for player in engine.players:
+            player.__dict__.pop('move', None)
+
+    def wrap(self, phase: str, method):
+        histogram = self.histograms.setdefault(phase, Histogram())
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter_ns() - start)
+        return timed
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def summary(self) -> dict:
+        # Copies first: the dump thread reads while the game thread keeps recording
+        histograms = list(self.histograms.items())
+        return {
+            'phases': {phase: histogram.summary() for phase, histogram in histograms if histogram.count},
+            'counters': dict(self.counters),
+        }
+
+    def dump(self, stream=None) -> None:
+        import json  # Only dumping needs it, not every game that imports the profiler
+
+        stream = stream if stream is not None else sys.stderr
+        json.dump(self.summary(), stream)
+        stream.write('\n')
+        stream.flush()
+
+    def start_periodic_dump(self, interval: float, stream=None) -> None:
+        import threading
+
+        self.dump_stop = threading.Event()
+
+        def run():
+            while not self.dump_stop.wait(interval):
+                self.dump(stream)
+
+        self.dump_thread = threading.Thread(target=run, name='profiler-dump', daemon=True)
+        self.dump_thread.start()
+
+    def stop_periodic_dump(self) -> None:
+        if self.dump_thread is not None:
+            self.dump_stop.set()
+            self.dump_thread.join()
+            self.dump_thread = None
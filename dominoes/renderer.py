@@ -0,0 +1,43 @@
+import sys
+
+from .domino_engine import Renderer, NullRenderer  # Part of the core, kept importable from here
+
+
+def format_player_tiles(engine) -> str:
+    pieces = engine.human.get_hand_tiles()
+    lines = ''.join(f'{i + 1}:{piece}\n' for i, piece in enumerate(pieces))
+    return f'\nYour pieces:\n{lines}\n'
+
+
+def format_interface(engine) -> str:
+    return (f'{"=" * 70}\n'
+            f'Stock size: {engine.tile_set.get_set_size()}\n'
+            f'Computer pieces: {engine.computer.get_amount_of_tiles()} \n\n'
+            f'{engine.snake}\n'
+            f'{format_player_tiles(engine)}'
+            f'Status: {engine.get_game_status_message()}\n')
+
+
+class ConsoleRenderer(Renderer):
+    def render(self, engine) -> None:
+        print(format_interface(engine), end='')
+
+    def illegal_move(self) -> None:
+        print('\nIllegal move. Please try again.')
+
+
+class BufferedRenderer(Renderer):
+    """
+    Builds each frame in memory and hands it to the stream in a single write.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def render(self, engine) -> None:
+        self.stream.write(format_interface(engine))
+        self.stream.flush()
+
+    def illegal_move(self) -> None:
+        self.stream.write('\nIllegal move. Please try again.\n')
+        self.stream.flush()
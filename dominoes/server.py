@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from .domino_engine import GameEngine
+from .domino_snake import DominoSnake
+from .player import Computer, Human
+from .lookahead import LookaheadComputer
+from .monte_carlo import MonteCarloComputer
+from .constants import GameState
+from .renderer import format_interface
+from .variants import Variant
+
+# name: (player factory, whether its moves are slow enough to leave the event loop)
+AI_PLAYERS = {
+    'greedy': (Computer, False),
+    'lookahead': (LookaheadComputer, True),
+    'montecarlo': (MonteCarloComputer, True),
+}
+
+# Player attributes that belong to one game and travel with every offloaded move. The rest,
+# such as LookaheadComputer's transposition table, stays in the worker process and is shared
+# by every game it searches, so thousands of sessions do not hold a table each
+GAME_STATE = ('hand_mask', 'pip_counts', 'arrivals', 'stock_size', 'opponent_tiles',
+              'constraints', 'last_length', 'last_stock', 'last_ends')
+
+_worker_players = {}  # ai name: the player of this worker process
+
+
+def ignore_interrupt() -> None:
+    # Ctrl+C reaches the whole process group, and the server shuts its workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def get_game_state(player) -> dict:
+    return {name: getattr(player, name) for name in GAME_STATE if hasattr(player, name)}
+
+
+def search_move(ai: str, state: dict, snake: DominoSnake) -> tuple:
+    """
+    Run in a worker process: move as a player in the given game state would, with the
+    worker's own player of that kind. Returns the move and the player's new game state.
+    """
+    player = _worker_players.get(ai)
+    if player is None:
+        player = _worker_players[ai] = AI_PLAYERS[ai][0]()
+    player.__dict__.update(state)
+    domino_end, tile = player.move(snake)
+    return domino_end, tile, get_game_state(player)
+
+
+class GameServer:
+    """
+    Line-based game server: every connection plays its own game as the Human against the
+    computer. The client sends the same commands as the console game, one per line.
+    """
+
+    def __init__(self, ai: str = 'greedy', max_connections: int = 1000, idle_timeout: float = 300.0,
+                 ai_workers: int = 4, variant: Variant = None):
+        self.ai = ai
+        self.ai_factory, self.offload_ai = AI_PLAYERS[ai]
+        self.variant = variant
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout  # Seconds to wait for a move before dropping the client
+        # Searches are pure Python and hold the GIL, so they run in other processes
+        self.executor = ProcessPoolExecutor(ai_workers, initializer=ignore_interrupt) if self.offload_ai else None
+        self.connections = 0
+        self.games_played = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.connections >= self.max_connections:
+            writer.write(b'The server is full. Please try again later.\n')
+            await close_writer(writer)
+            return
+
+        self.connections += 1
+        try:
+            await GameSession(self, reader, writer).run()
+            self.games_played += 1
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            await close_writer(writer)
+
+    async def serve_tcp(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=1024)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_unix(self, path: str) -> None:
+        server = await asyncio.start_unix_server(self.handle_connection, path, limit=1024)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+class GameSession:
+    def __init__(self, server: GameServer, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        # An offloaded player only keeps the game state here, its caches stay empty
+        self.engine = GameEngine([Human(), server.ai_factory()], variant=server.variant)
+
+    async def run(self) -> None:
+        engine = self.engine
+        engine.deal_dominoes()
+        engine.get_first_player()
+
+        while True:
+            if engine.current_player is engine.human:
+                await self.send(format_interface(engine))
+                await self.human_move()
+            else:
+                await self.computer_move()
+
+            engine.check_game_state()
+            if engine.game_state != GameState.IN_PROGRESS:
+                await self.send(format_interface(engine))
+                return
+            engine.switch_turn()
+
+    async def human_move(self) -> None:
+        human = self.engine.human
+        while True:
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), self.server.idle_timeout)
+            except ValueError:  # Longer than the stream limit, which drops it
+                await self.send('Invalid input. Please try again.\n')
+                continue
+            if not line:
+                raise ConnectionError('Client disconnected')
+
+            try:
+                index = int(line)
+            except ValueError:
+                await self.send('Invalid input. Please try again.\n')
+                continue
+            if not human.is_valid_index(index):
+                await self.send('Invalid input. Please try again.\n')
+                continue
+
+            if self.engine.try_move(*human.get_move_by_index(index)):
+                return
+            await self.send('\nIllegal move. Please try again.\n')
+
+    async def computer_move(self) -> None:
+        engine = self.engine
+        computer = engine.computer
+        engine.observe_table()
+        if self.server.offload_ai:
+            loop = asyncio.get_running_loop()
+            domino_end, tile, state = await loop.run_in_executor(
+                self.server.executor, search_move, self.server.ai, get_game_state(computer), engine.snake)
+            computer.__dict__.update(state)
+        else:
+            domino_end, tile = computer.move(engine.snake)
+        engine.try_move(domino_end, tile)
+
+    async def send(self, text: str) -> None:
+        self.writer.write(text.encode())
+        # A client that stops reading must not hold its connection past the idle timeout
+        await asyncio.wait_for(self.writer.drain(), self.server.idle_timeout)
+
+
+async def close_writer(writer: asyncio.StreamWriter) -> None:
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Host many Human vs Computer games over sockets.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='listen on a unix socket instead of TCP')
+    parser.add_argument('--ai', choices=sorted(AI_PLAYERS), default='greedy')
+    parser.add_argument('--max-connections', type=int, default=1000)
+    parser.add_argument('--idle-timeout', type=float, default=300.0, help='seconds')
+    parser.add_argument('--ai-workers', type=int, default=4, help='processes running the lookahead and montecarlo moves')
+    parser.add_argument('--set', type=int, choices=(6, 9, 12), default=6, help='play with the double-N set')
+    args = parser.parse_args()
+    if args.set != 6 and args.ai != 'greedy':
+        parser.error(f'the {args.ai} player only knows the double-6 set')
+
+    server = GameServer(args.ai, args.max_connections, args.idle_timeout, args.ai_workers, Variant(args.set))
+    try:
+        if args.unix:
+            asyncio.run(server.serve_unix(args.unix))
+        else:
+            asyncio.run(server.serve_tcp(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from random import Random
+from time import perf_counter
+from typing import NamedTuple, Optional
+
+from .domino_engine import GameEngine
+from .player import Computer, Player
+from .constants import GameState
+from .utils import derive_seed
+
+
+class GameResult(NamedTuple):
+    seed: int
+    winner: Optional[int]  # Seat index of the winner, None for a draw
+    turns: int
+    snake_length: int
+    pips: tuple  # Pips left in each seat's hand
+    redeals: int = 0  # Deals thrown away before both hands held a double
+
+
+def play_game(seed: int, first: Player, second: Player, recorder: 'GameRecorder' = None,
+              profiler: 'Profiler' = None, subscribers: tuple = ()) -> GameResult:
+    first.clear_hand_tiles()
+    second.clear_hand_tiles()
+
+    engine = GameEngine([first, second], Random(seed))
+    if recorder is not None:
+        engine.subscribe(recorder.handle)
+    for subscriber in subscribers:
+        engine.subscribe(subscriber)
+    if profiler is not None:
+        profiler.attach(engine)
+    engine.deal_dominoes()
+    engine.get_first_player()
+
+    turns = 0
+    while True:
+        engine.make_move()
+        turns += 1
+        engine.check_game_state()
+        if engine.game_state != GameState.IN_PROGRESS:
+            break
+        engine.switch_turn()
+
+    if profiler is not None:
+        profiler.detach(engine)
+
+    winner = None
+    if engine.game_state == GameState.GAME_OVER:
+        winner = 0 if first.get_amount_of_tiles() == 0 else 1
+
+    return GameResult(seed, winner, turns, len(engine.snake),
+                      (get_hand_pips(first), get_hand_pips(second)), engine.redeals)
+
+
+def get_hand_pips(player: Player) -> int:
+    return sum(sum(tile) for tile in player.get_hand_tiles())
+
+
+def run_games(n: int, seed: int = 0, first: Player = None, second: Player = None, log: 'GameLogWriter' = None,
+              profiler: 'Profiler' = None, subscribers: tuple = ()):
+    first = first if first is not None else Computer()
+    second = second if second is not None else Computer()
+
+    for game_index in range(n):
+        game_seed = derive_seed(seed, game_index)
+        if log is None:
+            yield play_game(game_seed, first, second, profiler=profiler, subscribers=subscribers)
+        else:
+            from .game_record import GameRecorder  # Loaded by the runs that record
+
+            recorder = GameRecorder(game_seed)
+            yield play_game(game_seed, first, second, recorder, profiler, subscribers)
+            log.append(recorder.get_record())
+
+
+def main():
+    # Worker processes only need play_game
+    import argparse
+    from .events import EventBatcher, EventStats
+    from .game_record import GameLogWriter
+    from .endgame import EndgameSolver, EndgameTable
+    from .profiling import Profiler
+    from .opening_book import OpeningBook
+
+    parser = argparse.ArgumentParser(description='Play headless computer vs computer games.')
+    parser.add_argument('-n', '--games', type=int, default=10000)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the run')
+    parser.add_argument('--record', metavar='PATH', help='append every game to a binary game log')
+    parser.add_argument('--endgame-tiles', type=int, default=0,
+                        help='solve endgames exactly once both hands together hold this many tiles or fewer')
+    parser.add_argument('--endgame-table', metavar='PATH', help='keep solved endgames in this file')
+    parser.add_argument('--opening-book', metavar='PATH', help='play the openings from this book')
+    parser.add_argument('--events', action='store_true', help='print totals gathered from the game events')
+    parser.add_argument('--profile', action='store_true', help='print per-phase timings and counters')
+    parser.add_argument('--profile-interval', type=float, metavar='SECONDS',
+                        help='also dump the profile to stderr periodically')
+    args = parser.parse_args()
+
+    log = GameLogWriter(args.record) if args.record else None
+    table = solver = None
+    if args.endgame_tiles:
+        table = EndgameTable(args.endgame_table) if args.endgame_table else EndgameTable()
+        solver = EndgameSolver(table)
+    book = OpeningBook(args.opening_book) if args.opening_book else None
+    first = Computer(args.endgame_tiles, solver, book)
+    second = Computer(args.endgame_tiles, solver, book)
+    profiler = Profiler() if args.profile or args.profile_interval else None
+    if args.profile_interval:
+        profiler.start_periodic_dump(args.profile_interval)
+    stats = batcher = None
+    subscribers = ()
+    if args.events:
+        stats = EventStats()
+        batcher = EventBatcher(stats.add_events)
+        subscribers = (batcher.add,)
+
+    wins = [0, 0]
+    draws = 0
+    turns = 0
+    redeals = 0
+
+    start = perf_counter()
+    for result in run_games(args.games, args.seed, first, second, log, profiler, subscribers):
+        if result.winner is None:
+            draws += 1
+        else:
+            wins[result.winner] += 1
+        turns += result.turns
+        redeals += result.redeals
+    if batcher is not None:
+        batcher.flush()
+    elapsed = perf_counter() - start
+
+    if log is not None:
+        log.close()
+    if table is not None:
+        table.close()
+
+    print(f'Games: {args.games}  Wins: {wins[0]}/{wins[1]}  Draws: {draws}')
+    print(f'Average turns: {turns / args.games:.2f}')
+    print(f'Redeal rate: {redeals / (args.games + redeals):.2%} of deals ({redeals / args.games:.3f} per game)')
+    print(f'Throughput: {args.games / elapsed:.0f} games/s ({elapsed:.2f}s)')
+    if args.endgame_tiles:
+        print(f'Endgame table: {table.hits} hits / {table.misses} misses')
+    if book is not None:
+        print(f'Opening book: {book.hits} hits / {book.misses} misses')
+        book.close()
+    if stats is not None:
+        summary = stats.summary()
+        print(f'Events: {summary["head_places"]} head / {summary["tail_places"]} tail places  '
+              f'Draws/game: {summary["draws_per_game"]:.2f}  Passes/game: {summary["passes_per_game"]:.2f}')
+    if profiler is not None:
+        profiler.stop_periodic_dump()
+        print_profile(profiler.summary())
+
+
+def print_profile(summary: dict) -> None:
+    print(f'{"Phase":18} {"Calls":>9} {"Total ms":>10} {"Mean us":>9} {"p99 us":>9}')
+    for phase, stats in summary['phases'].items():
+        print(f'{phase:18} {stats["count"]:>9} {stats["total_ms"]:>10.1f} {stats["mean_us"]:>9.2f} '
+              f'{stats["p99_us"]:>9.2f}')
+    for name, count in sorted(summary['counters'].items()):
+        print(f'{name}: {count}')
+
+
+if __name__ == "__main__":
+    main()
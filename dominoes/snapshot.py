@@ -0,0 +1,36 @@
+from typing import NamedTuple, Optional
+
+from .constants import DominoEnd, GameState, MoveKind
+from .tiles import TileTables, STANDARD_TABLES
+
+
+class GameSnapshot(NamedTuple):
+    """
+    Immutable copy of a game position. Named so as not to clash with constants.GameState.
+    """
+    hands: tuple  # Hand mask of each seat
+    stock: bytes  # Tile ids left in the stock, the next draw last
+    snake: bytes  # Tiles from head to tail, one byte each: id << 1 | flipped
+    current: int  # Seat to move
+    game_state: GameState
+
+
+class Move(NamedTuple):
+    kind: MoveKind
+    tile_id: Optional[int] = None  # The tile placed or drawn
+    domino_end: Optional[DominoEnd] = None
+    stock_index: Optional[int] = None  # Where a drawn tile was in the stock, filled in by GameEngine.apply()
+
+
+PASS = Move(MoveKind.PASS)
+DRAW = Move(MoveKind.DRAW)
+
+
+def pack_snake(snake) -> bytes:
+    # Up to the double-twelve set, tile ids fit in 7 bits
+    return bytes(tile.id << 1 | (tile.left > tile.right) for tile in snake)
+
+
+def unpack_snake(data: bytes, tile_tables: TileTables = STANDARD_TABLES) -> list:
+    tile_objects = tile_tables.tile_objects
+    return [tile_objects[code >> 1].flipped if code & 1 else tile_objects[code >> 1] for code in data]
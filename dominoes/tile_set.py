@@ -1,29 +1,98 @@
-from random import choice
+from copy import copy
+from random import Random
+from .tiles import Tile
+from .variants import Variant, DOUBLE_SIX
+
+MAX_REDEALS = 1000  # Far beyond any real deal: the worst variant needs a redeal in about 1 deal of 5
 
 
 class TileSet:
-    def __init__(self):
-        self.tile_set = []  # Storage the pieces
+    def __init__(self, rng: Random = None, variant: Variant = None):
+        self.rng = rng if rng is not None else Random()
+        self.tile_tables = (variant if variant is not None else DOUBLE_SIX).tile_tables
+        self.tile_ids = []  # Storage the ids of the pieces left in the stock, shuffled
+        self.mask = 0
         self.generate_tile_set()
 
+    @property
+    def tile_set(self) -> list:
+        return self.tile_tables.tiles_from_mask(self.mask)
+
     def generate_tile_set(self) -> None:
-        for i in range(7):  # 'i' points to the left number on the piece
-            for j in range(i, 7):  # 'j' points to the right number on the piece
-                tile = [i, j]
-                self.tile_set.append(tile)
+        self.tile_ids.extend(range(len(self.tile_tables.tiles)))
+        self.rng.shuffle(self.tile_ids)
+        self.mask = self.tile_tables.all_tiles_mask
 
     def display_tile_set(self) -> None:
         print(self.tile_set)
 
-    def give_tile(self) -> list:
-        if len(self.tile_set) > 0:
-            tile = choice(self.tile_set)
-            self.tile_set.remove(tile)
-            return tile
+    def give_tile(self) -> Tile:
+        if len(self.tile_ids) > 0:
+            return self.tile_tables.get_tile(self.give_tile_id())
+
+    def give_tile_id(self) -> int:
+        tile_id = self.tile_ids.pop()  # The stock is shuffled, so the last tile is a random one
+        self.mask ^= 1 << tile_id
+        return tile_id
+
+    def remove_tile_id(self, tile_id: int) -> int:
+        # Take a given tile out of the stock, returning where it was
+        index = self.tile_ids.index(tile_id)
+        del self.tile_ids[index]
+        self.mask ^= 1 << tile_id
+        return index
+
+    def return_tile_id(self, tile_id: int, index: int = None) -> None:
+        # Put a drawn tile back where it was, on top of the stock by default
+        if index is None:
+            self.tile_ids.append(tile_id)
+        else:
+            self.tile_ids.insert(index, tile_id)
+        self.mask |= 1 << tile_id
+
+    def set_tile_ids(self, tile_ids: list) -> None:
+        self.tile_ids = tile_ids
+        self.mask = sum(1 << tile_id for tile_id in tile_ids)
+
+    def copy(self) -> 'TileSet':
+        tile_set = copy(self)
+        tile_set.tile_ids = self.tile_ids[:]
+        return tile_set
 
     def reset_tile_set(self) -> None:
-        self.tile_set.clear()
+        self.tile_ids.clear()
         self.generate_tile_set()
 
+    def shuffle_opening(self, hands: int, hand_size: int, double_hands: int = None) -> int:
+        """
+        Reshuffle until dealing hand_size tiles to each hand in turn gives at least
+        double_hands hands, every hand by default, a double. Returns the number of reshuffles.
+
+        Every attempt is the same fresh shuffle as reset_tile_set, so the accepted order, and
+        the deal for a given rng, are those of dealing whole hands and redealing.
+        """
+        double_hands = hands if double_hands is None else double_hands
+        redeals = 0
+        while not self.deals_doubles(hands, hand_size, double_hands):
+            if redeals == MAX_REDEALS:
+                raise RuntimeError(f'no deal gave {double_hands} of {hands} hands a double in {redeals} shuffles')
+            self.reset_tile_set()
+            redeals += 1
+        return redeals
+
+    def deals_doubles(self, hands: int, hand_size: int, double_hands: int = None) -> bool:
+        # Tiles are dealt from the end of the stock, one per hand in turn
+        double_hands = hands if double_hands is None else double_hands
+        top = len(self.tile_ids) - 1
+        doubles_mask = self.tile_tables.doubles_mask
+        missing = hands - double_hands  # Hands that may go without a double
+        for seat in range(hands):
+            hand = self.tile_ids[top - seat::-hands][:hand_size]
+            if not any(doubles_mask >> tile_id & 1 for tile_id in hand):
+                missing -= 1
+                if missing < 0:
+                    return False
+        return True
+
     def get_set_size(self) -> int:
-        return len(self.tile_set)
+        return len(self.tile_ids)
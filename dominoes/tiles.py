@@ -0,0 +1,128 @@
+from functools import lru_cache
+
+# Every tile of the set gets a small integer id, so a group of tiles (a hand,
+# the stock) fits in one int with bit 'id' set for each tile it holds.
+
+
+class Tile:
+    """
+    An immutable tile in one orientation. TileTables creates both orientations of every
+    tile once, so tiles are shared, compared by identity and never copied: 'flipped' is
+    the other orientation, the tile itself for a double. Prints as the [left, right] list
+    tiles used to be.
+    """
+    __slots__ = ('id', 'left', 'right', 'flipped', 'max_pip')
+
+    def __init__(self, tile_id: int, left: int, right: int, max_pip: int, flipped: 'Tile' = None):
+        set_slot = object.__setattr__
+        set_slot(self, 'id', tile_id)
+        set_slot(self, 'left', left)
+        set_slot(self, 'right', right)
+        set_slot(self, 'max_pip', max_pip)
+        if flipped is None:
+            flipped = self if left == right else Tile(tile_id, right, left, max_pip, self)
+        set_slot(self, 'flipped', flipped)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Tile is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Tile is immutable')
+
+    def __getitem__(self, index: int) -> int:
+        return (self.left, self.right)[index]
+
+    def __iter__(self):
+        return iter((self.left, self.right))
+
+    def __len__(self):
+        return 2
+
+    def __reduce__(self):
+        # Unpickles to the shared tile, not a copy
+        return get_oriented_tile, (self.max_pip, self.left, self.right)
+
+    def __repr__(self):
+        return f'[{self.left}, {self.right}]'
+
+
+class TileTables:
+    """
+    Lookup tables of the double-'max_pip' set, built once per set by get_tile_tables().
+    """
+
+    def __init__(self, max_pip: int):
+        self.max_pip = max_pip
+        pips = range(max_pip + 1)
+        self.tiles = tuple((i, j) for i in pips for j in range(i, max_pip + 1))
+
+        self.tile_ids = {}  # Both orientations of a tile map to the same id
+        self.oriented_tiles = {}  # (left, right): the shared Tile in that orientation
+        for tile_id, (left, right) in enumerate(self.tiles):
+            self.tile_ids[left, right] = tile_id
+            self.tile_ids[right, left] = tile_id
+            tile = Tile(tile_id, left, right, max_pip)
+            self.oriented_tiles[left, right] = tile
+            self.oriented_tiles[right, left] = tile.flipped
+        self.tile_objects = tuple(self.oriented_tiles[tile] for tile in self.tiles)  # Low pip first
+
+        self.all_tiles_mask = (1 << len(self.tiles)) - 1
+
+        # pip_masks[p] holds every tile with at least one half equal to p
+        self.pip_masks = tuple(sum(1 << tile_id for tile_id, tile in enumerate(self.tiles) if pip in tile)
+                               for pip in pips)
+
+        self.doubles_mask = sum(1 << tile_id for tile_id, (left, right) in enumerate(self.tiles) if left == right)
+        self.double_ids = tuple(self.tile_ids[pip, pip] for pip in pips)
+
+    def get_tile_id(self, tile) -> int:
+        # Any [left, right] pair, or a Tile of this set
+        if type(tile) is Tile and tile.max_pip == self.max_pip:
+            return tile.id
+        return self.tile_ids[tile[0], tile[1]]
+
+    def get_tile(self, tile_id: int) -> Tile:
+        return self.tile_objects[tile_id]
+
+    def get_oriented_tile(self, left: int, right: int) -> Tile:
+        return self.oriented_tiles[left, right]
+
+    def tiles_from_mask(self, mask: int) -> list:
+        tile_objects = self.tile_objects
+        return [tile_objects[tile_id] for tile_id in iter_tile_ids(mask)]
+
+    def count_halves(self, mask: int, pip: int) -> int:
+        # Tile halves showing 'pip', the double counting twice
+        return (mask & self.pip_masks[pip]).bit_count() + (mask >> self.double_ids[pip] & 1)
+
+
+@lru_cache(maxsize=None)
+def get_tile_tables(max_pip: int) -> TileTables:
+    return TileTables(max_pip)
+
+
+def get_oriented_tile(max_pip: int, left: int, right: int) -> Tile:
+    return get_tile_tables(max_pip).oriented_tiles[left, right]
+
+
+def iter_tile_ids(mask: int):
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+# The double-six set, which the search players and the game log are built around
+STANDARD_TABLES = get_tile_tables(6)
+TILES = STANDARD_TABLES.tiles
+TILE_IDS = STANDARD_TABLES.tile_ids
+TILE_OBJECTS = STANDARD_TABLES.tile_objects
+ALL_TILES_MASK = STANDARD_TABLES.all_tiles_mask
+PIP_MASKS = STANDARD_TABLES.pip_masks
+DOUBLES_MASK = STANDARD_TABLES.doubles_mask
+DOUBLE_IDS = STANDARD_TABLES.double_ids
+
+get_tile_id = STANDARD_TABLES.get_tile_id
+get_tile = STANDARD_TABLES.get_tile
+tiles_from_mask = STANDARD_TABLES.tiles_from_mask
+count_halves = STANDARD_TABLES.count_halves
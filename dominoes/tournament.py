@@ -0,0 +1,96 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import NamedTuple
+
+from .player import Computer
+from .simulation import play_game
+from .utils import derive_seed
+
+SHARD_SIZE = 1000  # Seeds per task, independent of the number of workers
+
+
+class TournamentStats(NamedTuple):
+    games: int = 0
+    wins: tuple = (0, 0)
+    draws: int = 0
+    turns: int = 0
+
+    def merge(self, other: 'TournamentStats') -> 'TournamentStats':
+        return TournamentStats(self.games + other.games,
+                               (self.wins[0] + other.wins[0], self.wins[1] + other.wins[1]),
+                               self.draws + other.draws,
+                               self.turns + other.turns)
+
+
+def play_shard(seed: int, start: int, stop: int, first_class: type, second_class: type) -> TournamentStats:
+    first, second = first_class(), second_class()
+    wins = [0, 0]
+    draws = turns = 0
+
+    for game_index in range(start, stop):
+        result = play_game(derive_seed(seed, game_index), first, second)
+        if result.winner is None:
+            draws += 1
+        else:
+            wins[result.winner] += 1
+        turns += result.turns
+
+    return TournamentStats(stop - start, tuple(wins), draws, turns)
+
+
+def get_shards(games: int, shard_size: int = SHARD_SIZE) -> list:
+    return [(i, min(i + shard_size, games)) for i in range(0, games, shard_size)]
+
+
+def run_tournament(games: int, seed: int = 0, workers: int = None,
+                   first_class: type = Computer, second_class: type = Computer) -> TournamentStats:
+    shards = get_shards(games)
+    stats = TournamentStats()
+
+    if workers == 1:
+        for start, stop in shards:
+            stats = stats.merge(play_shard(seed, start, stop, first_class, second_class))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_shard, seed, start, stop, first_class, second_class)
+                   for start, stop in shards]
+        for future in futures:
+            stats = stats.merge(future.result())
+
+    return stats
+
+
+def timed_tournament(games: int, seed: int, workers: int) -> tuple:
+    start = perf_counter()
+    stats = run_tournament(games, seed, workers)
+    return stats, perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a computer vs computer tournament on all cores.')
+    parser.add_argument('-n', '--games', type=int, default=100000)
+    parser.add_argument('-s', '--seed', type=int, default=0, help='master seed of the tournament')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--scaling', action='store_true', help='compare against a single worker')
+    args = parser.parse_args()
+
+    stats, elapsed = timed_tournament(args.games, args.seed, args.workers)
+
+    print(f'Games: {stats.games}  Wins: {stats.wins[0]}/{stats.wins[1]}  Draws: {stats.draws}')
+    print(f'Average turns: {stats.turns / stats.games:.2f}')
+    print(f'Workers: {args.workers}  Throughput: {stats.games / elapsed:.0f} games/s ({elapsed:.2f}s)')
+
+    if args.scaling:
+        single_stats, single_elapsed = timed_tournament(args.games, args.seed, 1)
+        if single_stats != stats:
+            raise RuntimeError('Results differ between worker counts')
+        speedup = single_elapsed / elapsed
+        print(f'Single worker: {stats.games / single_elapsed:.0f} games/s ({single_elapsed:.2f}s)')
+        print(f'Speedup: {speedup:.2f}x  Efficiency: {speedup / args.workers:.0%}')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
+from hashlib import blake2b
+from random import Random
+
+from .tiles import Tile
+
+
 def sort_dictionary_by_values(dictionary: dict, des: bool = True) -> dict:
     return dict(sorted(dictionary.items(), key=lambda item: item[1], reverse=des))
 
@@ -13,5 +19,18 @@ def concat_lists(a: list, b: list):
 
     return concat_list
 
-def reverse_tile(tile: list) -> list:
-    return [tile[1], tile[0]]
\ No newline at end of file
+def reverse_tile(tile):
+    # A Tile has its other orientation ready, a [left, right] list gets a new one
+    if isinstance(tile, Tile):
+        return tile.flipped
+    return [tile[1], tile[0]]
+
+
+def derive_seed(seed: int, *path) -> int:
+    # Independent sub-stream seeds, e.g. derive_seed(master, game_index)
+    key = '/'.join(str(part) for part in (seed, *path))
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+def make_rng(seed: int, *path) -> Random:
+    return Random(derive_seed(seed, *path))
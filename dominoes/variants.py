@@ -0,0 +1,61 @@
+from .moves import get_move_tables
+from .tiles import get_tile_tables
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 8
+
+# Tiles dealt to each hand, by set and number of players
+HAND_SIZES = {
+    6: {2: 7, 3: 5, 4: 5},
+    9: {2: 10, 3: 10, 4: 10, 5: 8, 6: 8, 7: 6, 8: 6},
+    12: {2: 15, 3: 15, 4: 15, 5: 12, 6: 12, 7: 10, 8: 10},
+}
+
+
+class Variant:
+    """
+    The rules a game is played with: a double-'max_pip' set dealt to 'players' hands.
+
+    The tile and move tables are built once per set and shared by every variant using it.
+    The search players, the endgame solver and the game log only support DOUBLE_SIX.
+    """
+
+    def __init__(self, max_pip: int = 6, players: int = 2, hand_size: int = None):
+        if not MIN_PLAYERS <= players <= MAX_PLAYERS:
+            raise ValueError(f'a game needs {MIN_PLAYERS} to {MAX_PLAYERS} players, not {players}')
+
+        self.max_pip = max_pip
+        self.players = players
+        self.tile_tables = get_tile_tables(max_pip)
+        self.move_tables = get_move_tables(max_pip)
+        self.tile_count = len(self.tile_tables.tiles)
+        self.hand_size = hand_size if hand_size is not None else HAND_SIZES.get(max_pip, {}).get(players)
+        if self.hand_size is None or self.hand_size * players > self.tile_count:
+            raise ValueError(f'cannot deal {players} hands from the double-{max_pip} set')
+
+        # Halves showing a pip in the whole set, the double counting twice
+        self.closed_count = max_pip + 2
+        # Hands that must hold a double for a deal to stand. Two players both need one, as
+        # in the original game; with more, the highest double opens, so one is enough
+        self.double_hands = players if players == 2 else 1
+
+    @property
+    def is_standard(self) -> bool:
+        # Played like DOUBLE_SIX, which the double-six only tools require
+        return self.max_pip == 6 and self.players == 2 and self.hand_size == 7
+
+    @property
+    def name(self) -> str:
+        return f'double-{self.max_pip}/{self.players}p'
+
+    def __reduce__(self):
+        # Rebuilt on unpickling, so that it shares the cached tables
+        return Variant, (self.max_pip, self.players, self.hand_size)
+
+    def __repr__(self):
+        return f'Variant(max_pip={self.max_pip}, players={self.players}, hand_size={self.hand_size})'
+
+
+DOUBLE_SIX = Variant(6)
+DOUBLE_NINE = Variant(9)
+DOUBLE_TWELVE = Variant(12)
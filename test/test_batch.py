@@ -0,0 +1,20 @@
+import unittest
+
+from dominoes.batch_engine import BatchEngine
+from dominoes.player import Computer
+from dominoes.simulation import play_game
+from dominoes.utils import derive_seed
+
+SEED = 8
+GAMES = 500
+
+
+class BatchEngineTest(unittest.TestCase):
+    def test_matches_game_engine(self):
+        seeds = [derive_seed(SEED, game_index) for game_index in range(GAMES)]
+        first, second = Computer(), Computer()
+        self.assertEqual(BatchEngine(seeds).run(), [play_game(seed, first, second) for seed in seeds])
+
+
+if __name__ == '__main__':
+    unittest.main()
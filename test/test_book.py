@@ -0,0 +1,51 @@
+import unittest
+from random import Random
+
+from dominoes.moves import legal_moves
+from dominoes.opening_book import canonicalize, decode_move, encode_move
+from dominoes.tiles import TILES, TILE_IDS, iter_tile_ids
+
+SEED = 21
+POSITIONS = 3000
+
+
+def random_position(rng: Random) -> tuple:
+    hand_size = rng.choice((6, 7))
+    tile_ids = rng.sample(range(len(TILES)), hand_size + 1)
+    hand = sum(1 << tile_id for tile_id in tile_ids[:hand_size])
+    head, tail = TILES[tile_ids[hand_size]]
+    if rng.random() < 0.3:
+        tail = head  # The opening double
+    return hand, head, tail
+
+
+def rename(hand: int, names: list) -> int:
+    return sum(1 << TILE_IDS[names[left], names[right]] for left, right in (TILES[i] for i in iter_tile_ids(hand)))
+
+
+class CanonicalKeyTest(unittest.TestCase):
+    def test_renamed_positions_share_a_key_and_moves(self):
+        rng = Random(SEED)
+        for _ in range(POSITIONS):
+            hand, head, tail = random_position(rng)
+            names = list(range(7))
+            rng.shuffle(names)
+            renamed = rename(hand, names)
+            key, relabel = canonicalize(hand, head, tail, 14)
+            renamed_key, renamed_relabel = canonicalize(renamed, names[head], names[tail], 14)
+            self.assertEqual(key, renamed_key)
+
+            for tile_id, domino_end, orientation in legal_moves(hand, head, tail):
+                code = encode_move(tile_id, domino_end, head, tail, relabel)
+                move = decode_move(code, head, tail, relabel)
+                self.assertEqual(move[0], tile_id)
+                if head != tail:
+                    self.assertEqual(move[1], domino_end)
+                # The book move of one naming is a legal move in the other
+                move = decode_move(code, names[head], names[tail], renamed_relabel)
+                self.assertIsNotNone(move)
+                self.assertTrue(renamed >> move[0] & 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
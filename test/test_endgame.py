@@ -0,0 +1,69 @@
+import unittest
+from random import Random
+
+from dominoes.endgame import EndgameSolver, EndgameTable
+from dominoes.tiles import TILES
+
+SEED = 12
+POSITIONS = 400
+
+
+def negamax(mover: list, other: list, head: int, tail: int) -> int:
+    # Plain search over tile lists, without the solver's move tables or memo
+    placed = [tile for tile in TILES if tile not in mover and tile not in other]
+    values = [value for move, value in move_values(mover, other, head, tail, placed)]
+    if values:
+        return max(values)
+    if any(head in tile or tail in tile for tile in other):
+        return -negamax(other, mover, head, tail)
+    return 0  # Blocked
+
+
+def move_values(mover: list, other: list, head: int, tail: int, placed: list) -> list:
+    values = []
+    for tile in mover:
+        for end, pip in ((0, head), (1, tail)):
+            if pip not in tile:
+                continue
+            rest = [other_tile for other_tile in mover if other_tile != tile]
+            if not rest:
+                values.append(((tile, end), 1))
+                continue
+            new_pip = tile[1] if tile[0] == pip else tile[0]
+            new_head, new_tail = (new_pip, tail) if end == 0 else (head, new_pip)
+            halves = sum(placed_tile.count(new_head) for placed_tile in placed + [tile])
+            if new_head == new_tail and halves >= 8:
+                values.append(((tile, end), 0))
+            else:
+                values.append(((tile, end), -negamax(other, rest, new_head, new_tail)))
+    return values
+
+
+def random_position(rng: Random) -> tuple:
+    tile_ids = rng.sample(range(len(TILES)), rng.randint(2, 9))
+    split = rng.randint(1, len(tile_ids) - 1)
+    return tile_ids[:split], tile_ids[split:], rng.randint(0, 6), rng.randint(0, 6)
+
+
+def to_mask(tile_ids: list) -> int:
+    return sum(1 << tile_id for tile_id in tile_ids)
+
+
+class EndgameSolverTest(unittest.TestCase):
+    def test_matches_plain_search(self):
+        rng = Random(SEED)
+        # A tiny table, so that positions collide and replace each other
+        solver = EndgameSolver(EndgameTable(capacity=16))
+        for _ in range(POSITIONS):
+            mover, other, head, tail = random_position(rng)
+            mover_tiles, other_tiles = [TILES[i] for i in mover], [TILES[i] for i in other]
+            position = (to_mask(mover), to_mask(other), head, tail)
+            self.assertEqual(solver.solve(*position), negamax(mover_tiles, other_tiles, head, tail), position)
+
+            placed = [tile for tile in TILES if tile not in mover_tiles and tile not in other_tiles]
+            expected = sorted(value for move, value in move_values(mover_tiles, other_tiles, head, tail, placed))
+            self.assertEqual(sorted(value for move, value in solver.get_move_values(*position)), expected, position)
+
+
+if __name__ == '__main__':
+    unittest.main()
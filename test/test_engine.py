@@ -0,0 +1,310 @@
+import copy
+import pickle
+import unittest
+from collections import Counter
+from random import Random
+
+from dominoes.constants import DominoEnd, GameState, MoveKind
+from dominoes.domino_engine import GameEngine
+from dominoes.domino_snake import DominoSnake
+from dominoes.events import DealEvent, DrawEvent, EventStats, GameOverEvent, PassEvent, PlaceEvent
+from dominoes.game_record import GameRecorder
+from dominoes.lookahead import LookaheadComputer
+from dominoes.monte_carlo import MonteCarloComputer
+from dominoes.player import Computer
+from dominoes.profiling import Profiler
+from dominoes.snapshot import DRAW, PASS, Move
+from dominoes.tiles import get_oriented_tile, iter_tile_ids
+from dominoes.utils import make_rng
+from dominoes.variants import DOUBLE_NINE, DOUBLE_TWELVE, Variant
+
+SEED = 15
+GAMES = 200
+
+
+def start_game(game_index: int) -> GameEngine:
+    engine = GameEngine([Computer(), Computer()], make_rng(SEED, game_index))
+    engine.deal_dominoes()
+    engine.get_first_player()
+    return engine
+
+
+class ListComputer(Computer):
+    """
+    Computer that also keeps its hand as the list it used to be, in the order the tiles came,
+    and checks every move against the rule Computer.move had on that list.
+    """
+
+    def __init__(self, test: unittest.TestCase):
+        super().__init__()
+        self.test = test
+        self.hand_list = []
+
+    def take_tile(self, tile) -> None:
+        super().take_tile(tile)
+        if tile not in self.hand_list:
+            self.hand_list.append(tile)
+
+    def drop_tile(self, tile) -> None:
+        super().drop_tile(tile)
+        if tile and tile.flipped in self.hand_list:
+            self.hand_list.remove(tile.flipped)
+        elif tile in self.hand_list:
+            self.hand_list.remove(tile)
+
+    def clear_hand_tiles(self) -> None:
+        super().clear_hand_tiles()
+        self.hand_list = []
+
+    def move(self, snake=None):
+        domino_end, tile = super().move(snake)
+        self.test.assertEqual(self.hand_tiles, self.hand_list)
+        self.test.assertEqual(self.get_list_move(snake), (domino_end, tile))
+        return domino_end, tile
+
+    def get_list_move(self, snake) -> tuple:
+        # Score the hand by pip frequency, sort by score keeping the hand order for ties,
+        # and play the first tile fitting the head, else the tail
+        freq = Counter()
+        for left, right in list(snake) + self.hand_list:
+            freq[left] += 1
+            freq[right] += 1
+        scores = sorted(self.hand_list, key=lambda tile: freq[tile.left] + freq[tile.right], reverse=True)
+        for tile in scores:
+            if snake.head() in tile:
+                return DominoEnd.HEAD, tile
+            elif snake.tail() in tile:
+                return DominoEnd.TAIL, tile
+        return None, None
+
+
+def get_all_moves(engine: GameEngine) -> list:
+    # The legal moves, plus a draw of every tile in the stock by name
+    moves = engine.get_moves()
+    moves.extend(Move(MoveKind.DRAW, tile_id) for tile_id in iter_tile_ids(engine.tile_set.mask))
+    return moves
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_restore_after_every_turn(self):
+        for game_index in range(GAMES):
+            engine = start_game(game_index)
+            start = engine.snapshot()
+            snapshots = [start]
+            while engine.game_state == GameState.IN_PROGRESS:
+                engine.apply(engine.get_moves()[0])
+                snapshots.append(engine.snapshot())
+
+            restored = start_game(game_index)
+            for snapshot in snapshots:
+                restored.restore(snapshot)
+                self.assertEqual(restored.snapshot(), snapshot)
+
+
+class ApplyUndoTest(unittest.TestCase):
+    def test_undo_restores_every_move(self):
+        rng = Random(SEED)
+        for game_index in range(GAMES):
+            engine = start_game(game_index)
+            while engine.game_state == GameState.IN_PROGRESS:
+                before = engine.snapshot()
+                for move in get_all_moves(engine):
+                    engine.undo(engine.apply(move))
+                    self.assertEqual(engine.snapshot(), before, move)
+                engine.apply(rng.choice(engine.get_moves()))
+
+    def test_named_draw_keeps_stock_order(self):
+        engine = start_game(0)
+        before = engine.snapshot()
+        tile_id = engine.tile_set.tile_ids[0]  # The bottom of the stock, not the next draw
+        move = engine.apply(Move(MoveKind.DRAW, tile_id))
+        self.assertEqual(move.stock_index, 0)
+        engine.undo(move)
+        self.assertEqual(engine.snapshot(), before)
+
+
+def watch_game(engine: GameEngine) -> tuple:
+    events, stats, recorder, profiler = [], EventStats(), GameRecorder(), Profiler()
+    engine.subscribe(events.append)
+    engine.subscribe(lambda event: stats.add_events([event]))
+    engine.subscribe(recorder.handle)
+    profiler.attach(engine)
+    return events, stats, recorder, profiler
+
+
+def get_event_move(event) -> Move:
+    if type(event) is PlaceEvent:
+        return Move(MoveKind.PLACE, event.tile.id, event.domino_end)
+    return DRAW if type(event) is DrawEvent else PASS
+
+
+class EventTest(unittest.TestCase):
+    def test_make_move_and_apply_publish_the_same(self):
+        for game_index in range(GAMES):
+            engine = GameEngine([Computer(), Computer()], make_rng(SEED, game_index))
+            played = watch_game(engine)
+            engine.deal_dominoes()
+            engine.get_first_player()
+            while engine.game_state == GameState.IN_PROGRESS:
+                engine.make_move()
+                engine.check_game_state()
+                if engine.game_state == GameState.IN_PROGRESS:
+                    engine.switch_turn()
+
+            events = played[0]
+            self.assertIs(type(events[0]), DealEvent)
+            self.assertEqual(events[-1], GameOverEvent(engine.game_state, engine.get_winner()))
+            turns = events[1:-1]
+            self.assertTrue(all(type(event) in (PlaceEvent, DrawEvent, PassEvent) for event in turns))
+            self.assertEqual([event.seat for event in turns], [(turns[0].seat + i) % 2 for i in range(len(turns))])
+
+            engine = GameEngine([Computer(), Computer()], make_rng(SEED, game_index))
+            applied = watch_game(engine)
+            engine.deal_dominoes()
+            engine.get_first_player()
+            for event in turns:
+                engine.apply(get_event_move(event))
+
+            self.assertEqual(applied[0], events)
+            self.assertEqual(applied[1].summary(), played[1].summary())
+            self.assertEqual(applied[2].get_record(), played[2].get_record())
+            for counter in ('passes', 'draws'):
+                self.assertEqual(applied[3].counters[counter], played[3].counters[counter], counter)
+            self.assertEqual(played[3].counters['passes'], sum(type(event) is not PlaceEvent for event in turns))
+
+
+class ComputerMoveTest(unittest.TestCase):
+    def test_ties_go_to_the_first_tile_in_hand(self):
+        for game_index in range(300):
+            players = [ListComputer(self), ListComputer(self)]
+            engine = GameEngine(players, make_rng(5, game_index))
+            engine.deal_dominoes()
+            engine.get_first_player()
+            while engine.game_state == GameState.IN_PROGRESS:
+                engine.make_move()
+                engine.check_game_state()
+                engine.switch_turn()
+
+    def test_undo_keeps_hand_order(self):
+        rng = Random(SEED)
+        for game_index in range(GAMES):
+            engine = start_game(game_index)
+            while engine.game_state == GameState.IN_PROGRESS:
+                before = [player.hand_tiles for player in engine.players]
+                for move in get_all_moves(engine):
+                    engine.undo(engine.apply(move))
+                    self.assertEqual([player.hand_tiles for player in engine.players], before, move)
+                engine.apply(rng.choice(engine.get_moves()))
+
+
+class VariantTest(unittest.TestCase):
+    def test_search_players_refuse_other_variants(self):
+        for player_class in (LookaheadComputer, MonteCarloComputer):
+            for variant in (DOUBLE_NINE, Variant(6, 3)):
+                with self.assertRaises(ValueError):
+                    GameEngine([player_class()] + [Computer() for _ in range(variant.players - 1)], variant=variant)
+            GameEngine([player_class(), Computer()], make_rng(SEED, 0))
+
+
+class ListTileTest(unittest.TestCase):
+    def test_snake_takes_lists(self):
+        snake = DominoSnake([[3, 3]])
+        snake.append_tail([5, 3])
+        snake.append_head([3, 1])
+        snake.append([2, 2])
+        snake.appendleft([4, 4])
+        self.assertEqual([list(tile) for tile in snake], [[4, 4], [1, 3], [3, 3], [3, 5], [2, 2]])
+        for tile in snake:
+            self.assertIs(tile, get_oriented_tile(6, *tile))
+        self.assertEqual(snake.ends(), (4, 2))
+
+    def test_hand_takes_lists(self):
+        player = Computer()
+        player.take_tile([1, 2])
+        player.take_tile([5, 4])
+        self.assertTrue(player.has_tile([2, 1]))
+        self.assertEqual(player.pip_counts, [0, 1, 1, 0, 1, 1, 0])
+        player.drop_tile([2, 1])
+        player.drop_tile([4, 5])
+        self.assertEqual(player.hand_mask, 0)
+        self.assertEqual(player.pip_counts, [0] * 7)
+        self.assertEqual(player.hand_tiles, [])
+
+
+def render_snake(snake) -> str:
+    # The rendering from before the cached windows
+    if len(snake) <= 6:
+        return ''.join(f'{tile}' for tile in snake)
+    return f'{snake[0]}{snake[1]}{snake[2]}...{snake[-3]}{snake[-2]}{snake[-1]}'
+
+
+class SnakeTextTest(unittest.TestCase):
+    def test_matches_full_rendering(self):
+        rng = Random(SEED)
+        tiles = DOUBLE_TWELVE.tile_tables.tile_objects
+        for _ in range(300):
+            snakes = [DominoSnake(variant=DOUBLE_TWELVE)]
+            for _ in range(rng.randint(1, 60)):
+                snake = rng.choice(snakes)
+                unplaced = [tile for tile in tiles if not snake.placed_mask >> tile.id & 1]
+                operation = rng.randrange(6)
+                if operation == 0 or not snake:
+                    snake.append(rng.choice(unplaced))
+                elif operation == 1:
+                    snake.appendleft(rng.choice(unplaced).flipped)
+                elif operation == 2:
+                    snake.pop_head()
+                elif operation == 3:
+                    snake.pop_tail()
+                elif operation == 4:
+                    snakes.append(snake.copy())
+                # Render only now and then, so that several changes pile up between renderings
+                if rng.random() < 0.5:
+                    for other in snakes:
+                        self.assertEqual(str(other), render_snake(other))
+            for snake in snakes:
+                self.assertEqual(str(snake), render_snake(snake))
+
+
+class SnakeCopyTest(unittest.TestCase):
+    def assert_same_snake(self, snake, other):
+        self.assertIsNot(other, snake)
+        self.assertEqual(list(other), list(snake))
+        self.assertEqual(other.pip_counts, snake.pip_counts)
+        self.assertEqual(other.placed_mask, snake.placed_mask)
+        self.assertEqual(other.ends(), snake.ends())
+        self.assertEqual(str(other), str(snake))
+        self.assertIs(other.variant.tile_tables, snake.variant.tile_tables)
+
+    def test_copy_protocols(self):
+        for variant in (None, DOUBLE_TWELVE):
+            engine = GameEngine([Computer(), Computer()], make_rng(SEED, 1), variant=variant)
+            engine.deal_dominoes()
+            engine.get_first_player()
+            for _ in range(10):
+                if engine.game_state != GameState.IN_PROGRESS:
+                    break
+                engine.apply(engine.get_moves()[0])
+
+            snake = engine.snake
+            self.assert_same_snake(snake, copy.copy(snake))
+            self.assert_same_snake(snake, copy.deepcopy(snake))
+            self.assert_same_snake(snake, pickle.loads(pickle.dumps(snake)))
+
+
+class CloneTest(unittest.TestCase):
+    def test_clone_has_its_own_player_state(self):
+        player = MonteCarloComputer(rollouts=10, rng=Random(SEED))
+        engine = GameEngine([player, Computer()], make_rng(SEED, 0))
+        engine.deal_dominoes()
+        engine.get_first_player()
+        player.constraints.append([1, 0])
+
+        clone = engine.clone()
+        clone.players[0].constraints[0][1] += 1
+        clone.players[0].constraints.append([2, 0])
+        self.assertEqual(player.constraints, [[1, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
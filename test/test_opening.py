@@ -0,0 +1,92 @@
+import unittest
+from collections import Counter
+from math import comb
+from random import Random
+
+from dominoes.domino_engine import GameEngine
+from dominoes.player import Computer
+from dominoes.tile_set import TileSet
+from dominoes.tiles import DOUBLE_IDS
+from dominoes.utils import derive_seed, make_rng
+
+SEED = 18
+GAMES = 20000
+
+# Chance that both 7-tile hands from a 28-tile set hold a double
+ACCEPT_RATE = 1 - 2 * comb(21, 7) / comb(28, 7) + comb(14, 7) / comb(28, 7)
+
+# Chi-square critical value at p = 0.001 with 6 degrees of freedom
+CHI_SQUARE_CRITICAL = 22.458
+
+
+def legacy_opening(rng: Random) -> tuple:
+    # The recursive redeal it replaces, written as a loop: deal whole hands, redeal without doubles
+    tile_set = TileSet(rng)
+    players = [Computer(), Computer()]
+    redeals = 0
+    while True:
+        for i in range(7):
+            for player in players:
+                player.take_tile(tile_set.give_tile())
+        if all(player.get_snake_tile() for player in players):
+            return tuple(player.hand_mask for player in players), redeals
+        tile_set.reset_tile_set()
+        for player in players:
+            player.clear_hand_tiles()
+        redeals += 1
+
+
+def sampled_opening(rng: Random) -> tuple:
+    engine = GameEngine([Computer(), Computer()], rng)
+    engine.deal_dominoes()
+    return tuple(player.hand_mask for player in engine.players), engine.redeals
+
+
+def get_opening_double(hands: tuple) -> int:
+    # Pips of the double the game opens with
+    return max(get_highest_double(hand) for hand in hands)
+
+
+def get_highest_double(hand_mask: int) -> int:
+    return max((pip for pip in range(7) if hand_mask >> DOUBLE_IDS[pip] & 1), default=-1)
+
+
+class OpeningSamplerTest(unittest.TestCase):
+    def test_same_deal_for_same_seed(self):
+        for game_index in range(2000):
+            seed = derive_seed(SEED, game_index)
+            self.assertEqual(sampled_opening(Random(seed)), legacy_opening(Random(seed)))
+
+    def test_every_hand_has_a_double(self):
+        for game_index in range(2000):
+            hands, redeals = sampled_opening(make_rng(SEED, game_index))
+            for hand in hands:
+                self.assertNotEqual(get_highest_double(hand), -1)
+
+    def test_opening_double_distribution(self):
+        # Independent seeds for each sampler: the distributions must agree, not just the streams
+        sampled = Counter(get_opening_double(sampled_opening(make_rng(SEED, 0, i))[0])
+                          for i in range(GAMES))
+        legacy = Counter(get_opening_double(legacy_opening(make_rng(SEED, 1, i))[0])
+                         for i in range(GAMES))
+
+        chi_square = 0.0
+        for pip in range(7):
+            expected = (sampled[pip] + legacy[pip]) / 2
+            if expected:
+                chi_square += ((sampled[pip] - expected) ** 2 + (legacy[pip] - expected) ** 2) / expected
+        self.assertLess(chi_square, CHI_SQUARE_CRITICAL)
+
+    def test_redeal_rate(self):
+        deals = redeals = 0
+        for i in range(GAMES):
+            redeals += sampled_opening(make_rng(SEED, 2, i))[1]
+            deals += 1
+        accept_rate = deals / (deals + redeals)
+        # Five standard errors of a binomial proportion
+        tolerance = 5 * (ACCEPT_RATE * (1 - ACCEPT_RATE) / (deals + redeals)) ** 0.5
+        self.assertAlmostEqual(accept_rate, ACCEPT_RATE, delta=tolerance)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+from dominoes.constants import GameState
+from dominoes.game_record import GameLog, GameLogWriter, iter_records, replay
+from dominoes.simulation import run_games
+
+SEED = 7
+GAMES = 300
+
+
+class GameLogTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'games.log')
+
+    def test_write_read_and_replay(self):
+        with GameLogWriter(self.path) as writer:
+            results = list(run_games(GAMES, SEED, log=writer))
+
+        records = list(iter_records(self.path))
+        with GameLog(self.path) as log:
+            self.assertEqual(len(log), GAMES)
+            self.assertEqual([log[i] for i in range(len(log))], records)
+
+        for result, record in zip(results, records):
+            self.assertEqual(record.seed, result.seed)
+            for engine in replay(record):
+                pass
+            self.assertNotEqual(engine.game_state, GameState.IN_PROGRESS)
+            self.assertEqual(engine.get_winner(), result.winner)
+            self.assertEqual(len(engine.snake), result.snake_length)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from dominoes.constants import GameState
+from dominoes.domino_engine import GameEngine
+from dominoes.player import Computer
+from dominoes.renderer import BufferedRenderer, ConsoleRenderer
+from dominoes.utils import make_rng
+
+SEED = 14
+GAMES = 50
+
+
+class RendererTest(unittest.TestCase):
+    def test_console_and_buffered_write_the_same(self):
+        console, buffered = StringIO(), StringIO()
+        console_renderer, buffered_renderer = ConsoleRenderer(), BufferedRenderer(buffered)
+        for game_index in range(GAMES):
+            engine = GameEngine([Computer(), Computer()], make_rng(SEED, game_index))
+            engine.deal_dominoes()
+            engine.get_first_player()
+            while True:
+                with redirect_stdout(console):
+                    console_renderer.render(engine)
+                    console_renderer.illegal_move()
+                buffered_renderer.render(engine)
+                buffered_renderer.illegal_move()
+                if engine.game_state != GameState.IN_PROGRESS:
+                    break
+                engine.make_move()
+                engine.check_game_state()
+                if engine.game_state == GameState.IN_PROGRESS:
+                    engine.switch_turn()
+
+        self.assertEqual(console.getvalue().encode(), buffered.getvalue().encode())
+
+
+if __name__ == '__main__':
+    unittest.main()